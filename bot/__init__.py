@@ -3,13 +3,35 @@ import logging
 import threading
 from typing import Optional
 
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CommandHandler,
+    MessageHandler,
+    filters,
+)
 
-from core.config import TELEGRAM_BOT_TOKEN
+from core.config import (
+    BOT_CONCURRENT_UPDATES,
+    BOT_HANDLER_TIMEOUT,
+    BOT_MODE,
+    BOT_SHARED_LOOP,
+    TELEGRAM_BOT_TOKEN,
+    UPDATE_QUEUE_SIZE,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
 from core.exceptions import handle_exception
+from core.db import AsyncDatabase
+from core.http import HttpClient
+from core.redis import AsyncRedisClient
+from core.telegram import SharedHTTPXRequest
 from bot.handlers.admin import stop, get_status
 from bot.handlers.common import start, echo, unknown, get_id
-from bot.handlers.operations import set_command, get_command, help_command
+from bot.handlers.operations import set_command, get_command, help_command, import_command
+from bot.utils.processor import ChatOrderedUpdateProcessor
 
 
 class TelegramBot:
@@ -23,9 +45,17 @@ class TelegramBot:
         return cls._instance
 
     def __init__(self):
+        # __init__ runs on every TelegramBot() call, keep the singleton's state
+        if hasattr(self, "_lock"):
+            return
         self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
         self._stop_event: Optional[asyncio.Event] = None
         self._lock = threading.Lock()
+        self._application: Optional[Application] = None
+        self._bot_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.webhook = False
+        self.processor: Optional[ChatOrderedUpdateProcessor] = None
 
     def thread_start(self):
         """Start the bot thread"""
@@ -42,20 +72,94 @@ class TelegramBot:
         """Stop the bot thread"""
         with self._lock:
             if self._stop_event:
-                self._stop_event.set()
+                self._set_stop_event()
                 if self._thread:
                     self._thread.join(timeout=5)  # Wait for thread to finish
                     self._thread = None
                     logging.info("Bot thread stopped")
 
+    async def start(self):
+        """Start the bot on the running loop"""
+        if self._task and not self._task.done():
+            logging.warning("Bot task already running")
+            return
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._polling(self._stop_event))
+        logging.info("Bot task started")
+
+    async def stop(self):
+        """Stop the bot task and wait for a clean shutdown"""
+        if not self._task:
+            return
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except asyncio.TimeoutError:
+            logging.warning("Bot task did not stop in time, cancelled")
+        self._task = None
+        logging.info("Bot task stopped")
+
+    async def restart(self):
+        """Restart the bot in whichever mode it runs"""
+        if BOT_SHARED_LOOP:
+            await self.stop()
+            await self.start()
+            return
+        # Joining the thread blocks, keep it off the event loop
+        await asyncio.to_thread(self.thread_stop)
+        self.thread_start()
+
     @property
     def is_running(self) -> bool:
         """Check if bot is running"""
+        if self._task:
+            return not self._task.done()
         return bool(self._thread and self._thread.is_alive())
 
+    def stats(self) -> dict:
+        """Update processing statistics"""
+        return {
+            "running": self.is_running,
+            "webhook": self.webhook,
+            "queue_depth": self.queue_depth(),
+            **(self.processor.stats() if self.processor else {}),
+        }
+
+    def queue_depth(self) -> int:
+        """Updates received but not being handled yet"""
+        application = self._application
+        if application is None:
+            return 0
+        # The application moves updates to the processor right away, where
+        # they wait for their chat's turn and a slot
+        waiting = self.processor.waiting if self.processor else 0
+        return application.update_queue.qsize() + waiting
+
+    def _set_stop_event(self):
+        # asyncio.Event is not thread-safe, set it from the loop that waits on it
+        loop = self._bot_loop
+        if loop and loop.is_running() and loop is not _running_loop():
+            loop.call_soon_threadsafe(self._stop_event.set)
+        else:
+            self._stop_event.set()
+
     def _create(self, stop_event=None):
         """Create and configure the bot application"""
-        application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+        # asyncio primitives bind to one loop, so each application gets its own
+        self.processor = ChatOrderedUpdateProcessor(
+            max(1, BOT_CONCURRENT_UPDATES), BOT_HANDLER_TIMEOUT or None
+        )
+        application = (
+            ApplicationBuilder()
+            .token(TELEGRAM_BOT_TOKEN)
+            # Bot API calls share the outbound connection pool, long polling
+            # keeps its own connection
+            .request(SharedHTTPXRequest())
+            .concurrent_updates(self.processor)
+            # Bounded so webhook bursts are rejected instead of buffered forever
+            .update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE))
+            .build()
+        )
 
         # Store stop_event in application object
         application.stop_event = stop_event
@@ -68,6 +172,10 @@ class TelegramBot:
         application.add_handler(CommandHandler("set", set_command))
         application.add_handler(CommandHandler("get", get_command))
         application.add_handler(CommandHandler("help", help_command))
+        application.add_handler(CommandHandler("import", import_command))
+        application.add_handler(
+            MessageHandler(filters.Document.ALL & filters.CaptionRegex(r"^/import\b"), import_command)
+        )
 
         # Add message handlers
         application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), echo))
@@ -75,30 +183,101 @@ class TelegramBot:
 
         return application
 
-    async def _polling(self, loop: asyncio.AbstractEventLoop):
+    async def _polling(self, stop_event: asyncio.Event):
         """Main bot polling logic"""
+        loop = asyncio.get_running_loop()
         try:
-            self._stop_event = asyncio.Event()
-            application = self._create(self._stop_event)
+            self._bot_loop = loop
+            application = self._create(stop_event)
 
             await application.initialize()
             await application.start()
-            await application.updater.start_polling()
+            self._application = application
+            self.webhook = await self._set_webhook(application)
+            if not self.webhook:
+                await application.updater.start_polling()
 
             # Wait for stop signal
-            await self._stop_event.wait()
+            await stop_event.wait()
 
             logging.info("Stopping bot...")
-            await application.updater.stop()
+            if self.webhook:
+                # Let Telegram hold updates until the bot is started again
+                await application.bot.delete_webhook()
+                self.webhook = False
+            else:
+                await application.updater.stop()
+            self._application = None
             await application.stop()
             await application.shutdown()
             logging.info("Bot has been completely stopped")
         except Exception as e:
             handle_exception(e, "Bot exited with error")
+        finally:
+            self._application, self._bot_loop = None, None
+
+    async def _set_webhook(self, application: Application) -> bool:
+        """Register the webhook, returns False to fall back to polling"""
+        if BOT_MODE != "webhook":
+            return False
+        if not WEBHOOK_URL or not WEBHOOK_SECRET:
+            logging.warning("WEBHOOK_URL and WEBHOOK_SECRET are required, polling instead")
+            return False
+        try:
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        except Exception as e:
+            handle_exception(e, "Failed to set webhook, polling instead", source="bot")
+            return False
+        logging.info("Bot is receiving updates by webhook")
+        return True
+
+    async def feed_update(self, data: dict) -> bool:
+        """Queue a webhook update, returns False if it cannot be accepted now"""
+        application, loop = self._application, self._bot_loop
+        if application is None or not self.webhook:
+            return False
+
+        update = Update.de_json(data, application.bot)
+        if loop is asyncio.get_running_loop():
+            return self._enqueue(application, update)
+
+        # The bot runs on its own thread and loop
+        async def enqueue():
+            return self._enqueue(application, update)
+
+        future = asyncio.run_coroutine_threadsafe(enqueue(), loop)
+        return await asyncio.wrap_future(future)
+
+    def _enqueue(self, application: Application, update: Update) -> bool:
+        # update_queue alone is always near empty, so bound what is waiting overall
+        if self.queue_depth() < UPDATE_QUEUE_SIZE:
+            try:
+                application.update_queue.put_nowait(update)
+                return True
+            except asyncio.QueueFull:
+                pass
+        logging.warning("Update queue is full, rejecting webhook update")
+        return False
 
     def _loop(self):
         """Run bot in a new thread"""
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(self._polling(loop))
+        self._stop_event = asyncio.Event()
+        loop.run_until_complete(self._polling(self._stop_event))
+        # Release the pools bound to this thread's loop
+        loop.run_until_complete(AsyncRedisClient.close())
+        loop.run_until_complete(HttpClient.close())
+        loop.run_until_complete(AsyncDatabase.dispose())
         loop.close()
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
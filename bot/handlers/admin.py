@@ -2,6 +2,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 
+from bot.utils.metrics import track_handler
 from bot.utils.permission import admin_required
 from bot.services.reader import (
     get_restart_uuid,
@@ -9,9 +10,9 @@ from bot.services.reader import (
 )
 from bot.services.reader import get_web_status
 from core.exceptions import handle_exception
-from core.utils import send_message
 
 
+@track_handler
 @admin_required
 async def get_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /getweb command"""
@@ -19,11 +20,12 @@ async def get_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
 
 
+@track_handler
 @admin_required
 async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /stop command"""
-    restart_uuid = get_restart_uuid()
-    web_url = get_deploy_url()
+    restart_uuid = await get_restart_uuid()
+    web_url = await get_deploy_url()
 
     if not web_url:
         logging.warning("Cannot stop bot - web url has not been set")
@@ -51,7 +53,7 @@ async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 e,
                 message="Failed to send stop message",
                 source="stop_command",
-                notify_func=send_message,
+                notify=True,
             )
     else:
         logging.warning("Stop event not found")
@@ -1,6 +1,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from bot.utils.metrics import track_handler
+
+@track_handler
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command"""
     await context.bot.send_message(
@@ -8,6 +11,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text="I'm a bot, please talk to me!"
     )
 
+@track_handler
 async def get_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /getid command"""
     await context.bot.send_message(
@@ -15,6 +19,7 @@ async def get_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text=f"Your Telegram ID is: {update.effective_chat.id}",
     )
 
+@track_handler
 async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Echo the user message"""
     await context.bot.send_message(
@@ -22,6 +27,7 @@ async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text=update.message.text
     )
 
+@track_handler
 async def unknown(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle unknown commands"""
     await context.bot.send_message(
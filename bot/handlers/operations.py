@@ -2,8 +2,10 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 
+from bot.utils.metrics import track_handler
 from bot.utils.permission import admin_required
 from bot.services import page
+from bot.services.importer import import_pages
 from bot.services.reader import (
     get_alive_url,
     get_all_config,
@@ -23,9 +25,11 @@ from bot.services.writer import (
     set_deploy_url,
     set_alive_url,
 )
+from core.config import PAGE_IMPORT_MAX_BYTES
 from core.exceptions import handle_exception
 
 
+@track_handler
 @admin_required
 async def set_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /set command"""
@@ -70,6 +74,7 @@ async def set_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@track_handler
 @admin_required
 async def get_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /get command"""
@@ -85,17 +90,17 @@ async def get_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if key == "all":
             text = await get_all_config()
         elif key == "page":
-            text = page.get_pages()
+            text = await page.get_pages()
         elif key == "user":
-            text = get_access_granted_users()
+            text = await get_access_granted_users()
         elif key == "cf_node":
-            text = get_cf_node()
+            text = await get_cf_node()
         elif key == "alive":
-            text = get_alive_url()
+            text = await get_alive_url()
         elif key == "path":
-            text = get_path()
+            text = await get_path()
         elif key == "web":
-            text = get_deploy_url()
+            text = await get_deploy_url()
         elif key == "node":
             text = await get_node()
         elif key == "dashboard":
@@ -111,6 +116,48 @@ async def get_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@track_handler
+@admin_required
+async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /import command, pages come from the message or an attached file"""
+    chat_id = update.effective_chat.id
+    message = update.message
+    if message.document:
+        if message.document.file_size and message.document.file_size > PAGE_IMPORT_MAX_BYTES:
+            await context.bot.send_message(
+                chat_id=chat_id, text=f"File is larger than {PAGE_IMPORT_MAX_BYTES} bytes"
+            )
+            return
+        file = await context.bot.get_file(message.document.file_id)
+        text = (await file.download_as_bytearray()).decode("utf-8", errors="replace")
+    else:
+        # Everything after the command, which may be followed by a newline
+        parts = message.text.split(None, 1)
+        text = parts[1] if len(parts) > 1 else ""
+
+    if not text.strip():
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="Input format: /import followed by one name-url per line, or a file with /import as caption",
+        )
+        return
+
+    async def run():
+        try:
+            report = await import_pages(text)
+            await context.bot.send_message(chat_id=chat_id, text=report.format()[:4096])
+        except Exception as e:
+            handle_exception(e, "Failed to import pages", source="import_command")
+            await context.bot.send_message(
+                chat_id=chat_id, text=f"Error importing pages: {str(e)}"
+            )
+
+    # Imports outlive the per-update handler timeout, report back when done
+    context.application.create_task(run(), update=update)
+    await context.bot.send_message(chat_id=chat_id, text="Import started...")
+
+
+@track_handler
 @admin_required
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /help command"""
@@ -132,5 +179,6 @@ Available commands:
     dashboard: dashboard url => url
 /get <key> - Get configuration
     Keys: all, page, user, cf_node, alive, path, web, node, dashboard
+/import - Import many pages => one name-url per line, or a file with /import as caption
 """
     await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
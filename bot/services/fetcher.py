@@ -0,0 +1,163 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import (
+    PAGE_FETCH_CONTENT_TYPES,
+    PAGE_FETCH_MAX_BYTES,
+    PAGE_FETCH_TIMEOUT,
+)
+from core.exceptions import handle_exception
+from core.http import HttpClient
+
+# Bytes looked at for a BOM or <meta charset>, as in the HTML prescan
+SNIFF_BYTES = 1024
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class FetchError(Exception):
+    """The upstream response was rejected before it was fully read"""
+
+
+@dataclass
+class FetchResult:
+    content: Optional[str] = None
+    # sha256 of the utf-8 encoded content, same as content_hash()
+    hash: Optional[str] = None
+    size: int = 0
+    charset: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # The upstream answered 304 to a conditional request
+    not_modified: bool = False
+    error: Optional[str] = None
+
+
+def sniff_charset(head: bytes, declared: Optional[str] = None) -> str:
+    """Pick the charset of a body from its BOM, the declared charset or a meta tag"""
+    for bom, charset in BOMS:
+        if head.startswith(bom):
+            return charset
+    candidates = [declared]
+    match = META_CHARSET.search(head)
+    if match:
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+    for charset in candidates:
+        if not charset:
+            continue
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+class StreamDecoder:
+    """Decode a byte stream chunk by chunk while hashing the decoded text"""
+
+    def __init__(self, declared: Optional[str] = None):
+        self.declared = declared
+        self.charset: Optional[str] = None
+        self._head = b""
+        self._decoder = None
+        self._parts: list[str] = []
+        self._sha = hashlib.sha256()
+
+    def feed(self, chunk: bytes):
+        if self._decoder is None:
+            # Hold back the start of the body until the charset can be sniffed
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return
+            chunk, self._head = self._head, b""
+            self._start(chunk)
+        self._emit(self._decoder.decode(chunk))
+
+    def finish(self) -> str:
+        if self._decoder is None:
+            self._start(self._head)
+            self._emit(self._decoder.decode(self._head))
+        self._emit(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
+
+    @property
+    def hash(self) -> str:
+        return self._sha.hexdigest()
+
+    def _start(self, head: bytes):
+        self.charset = sniff_charset(head, self.declared)
+        self._decoder = codecs.getincrementaldecoder(self.charset)(errors="replace")
+
+    def _emit(self, text: str):
+        if text:
+            self._parts.append(text)
+            self._sha.update(text.encode())
+
+
+def check_content_type(content_type: Optional[str]):
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    # A missing Content-Type is sniffed as text
+    if media_type and media_type not in PAGE_FETCH_CONTENT_TYPES:
+        raise FetchError(f"Unsupported content type {media_type}")
+
+
+async def fetch_page(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    max_bytes: int = PAGE_FETCH_MAX_BYTES,
+    timeout: float = PAGE_FETCH_TIMEOUT,
+) -> FetchResult:
+    """Stream page content from URL, conditionally when validators are given"""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        # Bounds the whole fetch, so a slow drip can't hold the caller
+        async with asyncio.timeout(timeout):
+            async with HttpClient.get_instance().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return FetchResult(etag=etag, last_modified=last_modified, not_modified=True)
+                response.raise_for_status()
+                check_content_type(response.headers.get("Content-Type"))
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > max_bytes:
+                    raise FetchError(f"Body of {length} bytes exceeds {max_bytes}")
+
+                decoder = StreamDecoder(response.charset_encoding)
+                size = 0
+                # Decompressed bytes, so compressed bombs hit the cap too
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise FetchError(f"Body exceeds {max_bytes} bytes")
+                    decoder.feed(chunk)
+
+                return FetchResult(
+                    content=decoder.finish(),
+                    hash=decoder.hash,
+                    size=size,
+                    charset=decoder.charset,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+    except FetchError as e:
+        logging.warning(f"Rejected {url}: {e}")
+        return FetchResult(error=str(e))
+    except TimeoutError:
+        logging.warning(f"Fetching {url} took longer than {timeout}s")
+        return FetchResult(error=f"Timed out after {timeout}s")
+    except Exception as e:
+        handle_exception(e, "Failed to fetch page content", source="fetch_page")
+        return FetchResult(error=str(e) or type(e).__name__)
@@ -0,0 +1,191 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlmodel import select
+
+from bot.services.fetcher import FetchResult, fetch_page
+from bot.services.page import (
+    insert_blobs,
+    publish_pages,
+    release_blob,
+    set_source,
+    upsert_pages,
+)
+from bot.services.page_cache import compress_content
+from core.config import PAGE_IMPORT_CONCURRENCY, PAGE_IMPORT_MAX_ITEMS
+from core.db import async_session
+from core.exceptions import handle_exception
+from core.redis import async_redis_client
+from model.page import Page, PageBlob
+
+
+@dataclass
+class ImportItem:
+    name: str
+    source: str
+    # created, updated, unchanged or failed
+    status: str = "pending"
+    error: Optional[str] = None
+    blob: Optional[PageBlob] = field(default=None, repr=False)
+    fetch: Optional[FetchResult] = field(default=None, repr=False)
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.source if re.match(r"https?://", self.source) else None
+
+    def fail(self, error: str):
+        self.status, self.error = "failed", error
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "status": self.status, "error": self.error}
+
+
+@dataclass
+class ImportReport:
+    items: List[ImportItem]
+
+    def counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts(), "items": [item.to_dict() for item in self.items]}
+
+    def format(self) -> str:
+        counts = ", ".join(f"{status}: {n}" for status, n in self.counts().items())
+        lines = [f"Imported {len(self.items)} pages ({counts or 'nothing to do'})"]
+        lines += [
+            f"{item.name or '-'}: {item.error}"
+            for item in self.items
+            if item.status == "failed"
+        ]
+        return "\n".join(lines)
+
+
+def parse_import(text: str) -> List[ImportItem]:
+    """Parse one name-url or name-content pair per line, later duplicates win"""
+    items: List[ImportItem] = []
+    by_name: dict[str, ImportItem] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, _, source = line.partition("-")
+        item = ImportItem(name=name.strip(), source=source.strip())
+        if not item.name or not item.source:
+            item.fail("Line must be in format 'name-url'")
+        elif item.name in by_name:
+            by_name[item.name].fail("Replaced by a later line")
+        if item.status != "failed":
+            by_name[item.name] = item
+        items.append(item)
+    return items
+
+
+async def prepare(item: ImportItem, semaphore: asyncio.Semaphore):
+    """Fetch and compress an item's content"""
+    content = item.source
+    if item.url:
+        async with semaphore:
+            item.fetch = await fetch_page(item.url)
+        if item.fetch.error:
+            item.fail(f"Fetch failed: {item.fetch.error}")
+            return
+        content = item.fetch.content
+    # Compression is CPU bound, keep it off the event loop
+    item.blob = await asyncio.to_thread(compress_content, content)
+
+
+async def store(items: List[ImportItem]) -> List[Page]:
+    """Upsert all prepared items in a single transaction"""
+    names = [item.name for item in items]
+    hashes = {item.blob.hash for item in items}
+    async with async_session() as session:
+        pages = {
+            page.name: page
+            for page in (await session.exec(select(Page).where(Page.name.in_(names)))).all()
+        }
+        stored = set(
+            (await session.exec(select(PageBlob.hash).where(PageBlob.hash.in_(hashes)))).all()
+        )
+
+        changed = []
+        for item in items:
+            page = pages.get(item.name)
+            if page is not None and page.hash == item.blob.hash and page.url == item.url:
+                item.status = "unchanged"
+            else:
+                changed.append((item, page))
+        await insert_blobs(
+            session,
+            {
+                item.blob.hash: item.blob
+                for item, _ in changed
+                if item.blob.hash not in stored
+            }.values(),
+        )
+
+        rows, released = [], set()
+        for item, page in changed:
+            if page is None:
+                item.status = "created"
+            else:
+                item.status = "updated"
+                if page.hash and page.hash != item.blob.hash:
+                    released.add(page.hash)
+            row = Page(name=item.name, hash=item.blob.hash, size=item.blob.size)
+            set_source(row, item.url, item.fetch)
+            rows.append(row)
+        # One upsert on name, so a page created concurrently is overwritten
+        # instead of failing the whole import
+        await upsert_pages(session, rows)
+
+        for hash in released - hashes:
+            await release_blob(session, hash)
+        written = []
+        if rows:
+            statement = (
+                select(Page)
+                .where(Page.name.in_([row.name for row in rows]))
+                .execution_options(populate_existing=True)
+            )
+            written = (await session.exec(statement)).all()
+        await session.commit()
+        return written
+
+
+async def import_pages(
+    text: str,
+    concurrency: int = PAGE_IMPORT_CONCURRENCY,
+    max_items: int = PAGE_IMPORT_MAX_ITEMS,
+) -> ImportReport:
+    """Import many pages, fetching URLs concurrently and writing them in one batch"""
+    items = parse_import(text)
+    if len(items) > max_items:
+        raise ValueError(f"Too many pages, at most {max_items} per import")
+
+    pending = [item for item in items if item.status == "pending"]
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(*(prepare(item, semaphore) for item in pending))
+
+    ready = [item for item in pending if item.status == "pending"]
+    if not ready:
+        return ImportReport(items)
+    try:
+        pages = await store(ready)
+    except Exception as e:
+        handle_exception(e, "Failed to import pages", source="importer")
+        for item in ready:
+            item.fail(f"Database write failed: {e}")
+        return ImportReport(items)
+
+    urls = [item.url for item in ready if item.url]
+    if urls:
+        await async_redis_client.sadd("page", *urls)
+    if pages:
+        await publish_pages(*pages)
+    return ImportReport(items)
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from bot.services.probe import ProbeResult, probe_many
+from core.config import MONITOR_HISTORY
+from core.redis import async_redis_client
+from core.stats import percentile
+
+
+class HealthMonitor:
+    """
+    Keep recent probe results of the alive URLs.
+
+    check() is run periodically by the web scheduler, its probes also keep
+    the alive URLs warm.
+    """
+
+    def __init__(self, history: int = MONITOR_HISTORY):
+        self.history = history
+        # url => ring buffer of (checked_at, ProbeResult)
+        self._results: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.last_run: Optional[float] = None
+
+    async def check(self):
+        """Probe every alive URL once"""
+        urls = await async_redis_client.smembers("alive")
+        with self._lock:
+            # Forget URLs that were removed from the alive set
+            for url in set(self._results) - set(urls):
+                del self._results[url]
+        async for result in probe_many(urls):
+            self.record(result)
+        self.last_run = time.time()
+
+    def record(self, result: ProbeResult):
+        with self._lock:
+            results = self._results.get(result.url)
+            if results is None:
+                results = self._results[result.url] = deque(maxlen=self.history)
+            results.append((time.time(), result))
+
+    def summary(self) -> dict[str, dict]:
+        """Uptime and latency percentiles per URL"""
+        with self._lock:
+            snapshot = {url: list(results) for url, results in self._results.items()}
+
+        summary = {}
+        for url, results in sorted(snapshot.items()):
+            checked_at, last = results[-1]
+            latencies = [r.latency for _, r in results if r.ok and r.latency is not None]
+            summary[url] = {
+                "ok": last.ok,
+                "status": last.status,
+                "error": last.error,
+                "checked_at": checked_at,
+                "samples": len(results),
+                "uptime": round(sum(r.ok for _, r in results) / len(results) * 100, 2),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+            }
+        return summary
+
+
+def format_health(summary: dict[str, dict]) -> str:
+    """Format a monitor summary for /status"""
+    lines = []
+    for url, health in summary.items():
+        if health["ok"]:
+            state = "is ok"
+        elif health["status"] is not None:
+            state = f"is error, status: {health['status']}"
+        else:
+            state = f"is error: {health['error']}"
+        latency = (
+            f", p50 {health['p50']}ms, p95 {health['p95']}ms"
+            if health["p50"] is not None
+            else ""
+        )
+        lines.append(f"{url} {state} (uptime {health['uptime']}%{latency})")
+
+    checked_at = max(health["checked_at"] for health in summary.values())
+    lines.append(f"checked {int(time.time() - checked_at)}s ago")
+    return "\n".join(lines)
+
+
+health_monitor = HealthMonitor()
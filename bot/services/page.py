@@ -1,13 +1,26 @@
-from typing import Tuple
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 import re
 
-import httpx
+from sqlalchemy import delete, exists
+from sqlalchemy.dialects import mysql, sqlite
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import PAGE_LIST_LIMIT
 from core.exceptions import handle_exception
-from core.db import get_session
-from core.redis import redis_client
-from model.page import Page
+from core.db import async_session
+from core.redis import async_redis_client
+from model.page import PAGE_SUMMARY_COLUMNS, Page, PageBlob, PageSummary
+from bot.services.fetcher import FetchResult, fetch_page
+from bot.services.page_cache import (
+    CachedPage,
+    compress_content,
+    content_hash,
+    page_cache,
+)
+from bot.services.page_index import PageEntry, page_index
 
 
 def parse_page_data(data: str) -> Tuple[str, str]:
@@ -20,16 +33,158 @@ def parse_page_data(data: str) -> Tuple[str, str]:
         raise ValueError("Data must be in format 'name-content'")
 
 
-async def fetch_page_content(url: str):
-    """Fetch page content from URL"""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.text
-    except Exception as e:
-        handle_exception(e, "Failed to fetch page content", source="fetch_page_content")
-        return None
+def set_validators(page: Page, result: FetchResult):
+    """Remember the validators of a fetch for the next conditional request"""
+    page.etag = result.etag
+    page.last_modified = result.last_modified
+    page.fetched_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def set_source(page: Page, url: Optional[str], result: Optional[FetchResult]):
+    """Record where content came from, literal content keeps no url for the refresher"""
+    page.url = url
+    if url:
+        set_validators(page, result)
+    else:
+        page.etag = page.last_modified = page.fetched_at = None
+
+
+async def set_content(
+    session: AsyncSession,
+    page: Page,
+    content: str | None,
+    blob: Optional[PageBlob] = None,
+):
+    """Point a page at the blob for content, storing the blob if it is new"""
+    hash = blob.hash if blob else content_hash(content)
+    size = (await session.exec(select(PageBlob.size).where(PageBlob.hash == hash))).first()
+    if size is None:
+        if blob is None:
+            # Compression is CPU bound, keep it off the event loop
+            blob = await asyncio.to_thread(compress_content, content)
+        await insert_blobs(session, [blob])
+        size = blob.size
+
+    old_hash = page.hash
+    page.hash, page.size = hash, size
+    session.add(page)
+    if old_hash and old_hash != hash:
+        await release_blob(session, old_hash)
+
+
+def _insert_ignore(dialect: str):
+    """INSERT that skips blobs already stored, MySQL in production and SQLite in tests"""
+    if dialect == "mysql":
+        statement = mysql.insert(PageBlob.__table__)
+        return statement.on_duplicate_key_update(hash=statement.inserted.hash)
+    return sqlite.insert(PageBlob.__table__).on_conflict_do_nothing(index_elements=["hash"])
+
+
+async def insert_blobs(session: AsyncSession, blobs: Iterable[PageBlob]):
+    """Store blobs, skipping any a concurrent writer stored first"""
+    rows = [
+        {
+            "hash": blob.hash,
+            "content_gzip": blob.content_gzip,
+            "content_br": blob.content_br,
+            "size": blob.size,
+        }
+        for blob in blobs
+    ]
+    if rows:
+        await session.exec(_insert_ignore(session.get_bind().dialect.name), params=rows)
+
+
+def _upsert_by_name(dialect: str, columns: List[str]):
+    """INSERT that overwrites columns of the page with the same name"""
+    table = Page.__table__
+    if dialect == "mysql":
+        statement = mysql.insert(table)
+        return statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in columns}
+        )
+    statement = sqlite.insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={column: statement.excluded[column] for column in columns},
+    )
+
+
+async def upsert_pages(session: AsyncSession, pages: Iterable[Page]):
+    """Write pages by name in one statement, creating or overwriting each"""
+    rows = [page.model_dump(exclude={"id"}) for page in pages]
+    if rows:
+        columns = [column for column in rows[0] if column != "name"]
+        statement = _upsert_by_name(session.get_bind().dialect.name, columns)
+        await session.exec(statement, params=rows)
+
+
+async def release_blob(session: AsyncSession, hash: str):
+    """Delete a blob once no page references it"""
+    # One statement, so a page pointed at the blob meanwhile keeps it
+    statement = (
+        delete(PageBlob)
+        .where(PageBlob.hash == hash, ~exists().where(Page.hash == hash))
+        .execution_options(synchronize_session=False)
+    )
+    await session.exec(statement)
+
+
+async def find_page(session: AsyncSession, name: str) -> Optional[Page]:
+    """Get a page by name"""
+    return (await session.exec(select(Page).where(Page.name == name))).first()
+
+
+async def list_pages(
+    session: AsyncSession, after: int = 0, limit: int = PAGE_LIST_LIMIT
+) -> List[PageSummary]:
+    """List pages with id greater than after, ordered by id"""
+    statement = (
+        select(*PAGE_SUMMARY_COLUMNS)
+        .where(Page.id > after)
+        .order_by(Page.id)
+        .limit(limit)
+    )
+    rows = (await session.exec(statement)).all()
+    return [PageSummary.model_validate(row._mapping) for row in rows]
+
+
+async def iter_pages(
+    session: AsyncSession, batch_size: int = PAGE_LIST_LIMIT
+) -> AsyncIterator[PageSummary]:
+    """Iterate over all pages in keyset-paginated batches"""
+    after = 0
+    while True:
+        batch = await list_pages(session, after, batch_size)
+        for page in batch:
+            yield page
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].id
+
+
+async def list_url_pages(
+    session: AsyncSession, after: int = 0, limit: int = PAGE_LIST_LIMIT
+) -> list:
+    """List URL-backed pages with their validators, ordered by id"""
+    statement = (
+        select(Page.id, Page.name, Page.url, Page.hash, Page.etag, Page.last_modified)
+        .where(Page.id > after, Page.url.is_not(None))
+        .order_by(Page.id)
+        .limit(limit)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def load_page(session: AsyncSession, name: str) -> Optional[PageBlob]:
+    """Load the blob a page points at"""
+    statement = select(PageBlob).join(Page, Page.hash == PageBlob.hash).where(Page.name == name)
+    return (await session.exec(statement)).first()
+
+
+async def get_cached_page(session: AsyncSession, name: str) -> Optional[CachedPage]:
+    """Get a rendered page through the page cache, loading it on a miss"""
+    return await page_cache.get(name, lambda: load_page(session, name))
 
 
 # @handle_db_error
@@ -38,43 +193,80 @@ async def set_page(data: str):
     """Set page content in database and Redis"""
     name, content = parse_page_data(data)
 
-    session = next(get_session())
-    page = session.exec(select(Page).where(Page.name == name)).first()
+    session = async_session()
+    page = await find_page(session, name)
 
     try:
+        url = result = None
         if re.match(r"https?://", content):
-            page_content = await fetch_page_content(content)
-            redis_client.sadd("page", content)
-
-            if page:
-                page.url = content
-                page.content = page_content
-            else:
-                page = Page(name=name, url=content, content=page_content)
+            url = content
+            result = await fetch_page(url)
+            if result.error:
+                raise ValueError(f"Failed to fetch {url}: {result.error}")
+            content = result.content
+            await async_redis_client.sadd("page", url)
 
-        else:
-            if page:
-                page.content = content
-            else:
-                page = Page(name=name, content=content)
+        # Same body and source, nothing to write or invalidate
+        if (
+            page is not None
+            and page.hash == content_hash(content)
+            and page.url == url
+        ):
+            return
 
-        session.add(page)
-        session.commit()
+        if page is None:
+            page = Page(name=name)
+        set_source(page, url, result)
+        await set_content(session, page, content)
+        await session.commit()
+        await publish_pages(page)
 
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         handle_exception(e, "Failed to set page", source="page")
         raise
     finally:
-        session.close()
+        await session.close()
 
 
-def get_pages():
+async def publish_pages(*pages: Page):
+    """Make committed pages visible to the page index and page cache of every process"""
+    data = {
+        page.name: {"id": page.id, "name": page.name, "hash": page.hash, "size": page.size}
+        for page in pages
+    }
+    for entry in data.values():
+        page_index.upsert(PageEntry(**entry))
+    await page_cache.invalidate(*data, data=data)
+
+
+async def _on_page_published(name: Optional[str], data: Optional[dict]):
+    """Apply page writes published by other processes to the page index"""
+    if name is None:
+        # Messages may have been missed while disconnected
+        await load_page_index()
+    elif data is not None:
+        page_index.upsert(PageEntry(**data))
+
+
+# Writes from any process, ours included, keep the page index current
+page_cache.add_listener(_on_page_published)
+
+
+async def get_pages():
     """Get all pages"""
-    session = next(get_session())
-    try:
-        pages = session.exec(select(Page)).all()
-        result = ";".join([f"{p.name}" for p in pages])
+    async with async_session() as session:
+        result = ";".join([p.name async for p in iter_pages(session)])
         return f"pages: {result}"
-    finally:
-        session.close()
+
+
+async def load_page_index():
+    """Build the in-process page index from the database"""
+    async with async_session() as session:
+        page_index.load(
+            [
+                PageEntry(id=p.id, name=p.name, hash=p.hash, size=p.size)
+                async for p in iter_pages(session)
+            ]
+        )
+        return len(page_index)
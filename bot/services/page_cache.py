@@ -0,0 +1,299 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import brotli
+
+from core.cache import LRUCache
+from core.config import PAGE_BROTLI_QUALITY, PAGE_CACHE_BYTES, PAGE_REDIS_TTL
+from core.exceptions import handle_exception
+from core.redis import AsyncRedisClient
+from model.page import PageBlob
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip")
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    content: bytes
+    hash: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.hash}"'
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.content) + len(self.gzip or b"") + len(self.br or b"")
+
+    def encode(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Pick the stored variant that best matches Accept-Encoding"""
+        accepted = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in ENCODINGS:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            variant = getattr(self, encoding)
+            # Tiny pages can grow when compressed
+            if q > best_q and variant is not None and len(variant) < len(self.content):
+                best, best_q = encoding, q
+        if best is None:
+            return self.content, None
+        return getattr(self, best), best
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of a single representation"""
+        return f'"{self.hash}-{encoding}"' if encoding else self.etag
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def content_hash(content: Optional[str]) -> str:
+    """sha256 of page content, the key of its blob"""
+    return hashlib.sha256((content or "").encode()).hexdigest()
+
+
+def compress_content(content: Optional[str]) -> PageBlob:
+    """Hash and precompress page content into a blob row, CPU bound"""
+    body = (content or "").encode()
+    return PageBlob(
+        hash=content_hash(content),
+        content_gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        content_br=brotli.compress(body, mode=brotli.MODE_TEXT, quality=PAGE_BROTLI_QUALITY),
+        size=len(body),
+    )
+
+
+def render_page(blob: PageBlob) -> CachedPage:
+    """Build a cache entry from a stored blob"""
+    return CachedPage(
+        content=gzip.decompress(blob.content_gzip),
+        hash=blob.hash,
+        gzip=blob.content_gzip,
+        br=blob.content_br,
+    )
+
+
+def etag_matches(if_none_match: Optional[str], page: CachedPage) -> bool:
+    """Check an If-None-Match header against any representation of a page"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(page.etag_for(encoding) in tags for encoding in (None, *ENCODINGS))
+
+
+class PageCache:
+    """
+    Read-through page cache, an in-process LRU (L1) over Redis (L2).
+
+    L2 stores each page's blob as a Redis hash under a key carrying the page's
+    generation. Writers bump the generation and publish the page name, so
+    every process drops its L1 entry and reads the new key, while fills racing
+    with a write land on the old generation and simply expire. Listeners get
+    each published name with the data sent along, or None after a reconnect
+    when messages may have been missed.
+    """
+
+    # Bump when the stored format changes so old entries are never read
+    prefix = "page:cache:v1"
+    channel = "page:cache:invalidate"
+
+    def __init__(self, maxbytes: int = PAGE_CACHE_BYTES, ttl: int = PAGE_REDIS_TTL):
+        self.ttl = ttl
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.errors = 0
+        # Bounded by bytes, a few large pages would blow an entry count
+        self._l1 = LRUCache(maxbytes, weigher=lambda page: page.nbytes)
+        # Bumped on every eviction so in-flight misses don't store stale pages
+        self._epoch = 0
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Optional[str], Optional[dict]], Awaitable]] = []
+
+    async def get(
+        self, name: str, loader: Callable[[], Awaitable[Optional[PageBlob]]]
+    ) -> Optional[CachedPage]:
+        """Get a page, calling loader() for its blob when neither tier has it"""
+        page = self._l1.get(name)
+        if page is not None:
+            self.l1_hits += 1
+            return page
+
+        epoch = self._epoch
+        generation, blob = await self._l2_get(name)
+        if blob is not None:
+            self.l2_hits += 1
+        else:
+            self.misses += 1
+            blob = await loader()
+            if blob is None:
+                return None
+            if generation is not None:
+                await self._l2_set(name, generation, blob)
+
+        page = render_page(blob)
+        if epoch == self._epoch:
+            self._l1.set(name, page)
+        return page
+
+    def add_listener(self, listener: Callable[[Optional[str], Optional[dict]], Awaitable]):
+        """Call listener(name, data) for invalidations published by any process"""
+        self._listeners.append(listener)
+
+    async def invalidate(self, *names: str, data: Optional[dict[str, dict]] = None):
+        """Move pages to a new generation and evict them from every process"""
+        for name in names:
+            self.evict(name)
+        try:
+            client = AsyncRedisClient.get_instance()
+            async with client.pipeline(transaction=False) as pipe:
+                for name in names:
+                    message = {"name": name, "data": (data or {}).get(name)}
+                    pipe.incr(self._generation_key(name))
+                    pipe.publish(self.channel, json.dumps(message))
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            handle_exception(e, "Failed to invalidate cached pages", source="page_cache")
+
+    def evict(self, name: Optional[str] = None):
+        """Drop a page from L1, every page when no name is given"""
+        self._epoch += 1
+        if name is None:
+            self._l1.clear()
+        else:
+            self._l1.pop(name)
+
+    def stats(self) -> dict:
+        total = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "size": len(self._l1),
+            "bytes": self._l1.weight,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.l1_hits + self.l2_hits) / total, 4) if total else None,
+            "errors": self.errors,
+            "listening": self._task is not None and not self._task.done(),
+        }
+
+    async def start(self):
+        """Start the invalidation subscriber on the running loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _generation_key(self, name: str) -> str:
+        return f"{self.prefix}:gen:{name}"
+
+    def _page_key(self, name: str, generation: int) -> str:
+        return f"{self.prefix}:page:{name}:{generation}"
+
+    async def _l2_get(self, name: str) -> Tuple[Optional[int], Optional[PageBlob]]:
+        """Read the page's generation and its blob at that generation"""
+        try:
+            client = AsyncRedisClient.get_instance(decode_responses=False)
+            generation = int(await client.get(self._generation_key(name)) or 0)
+            fields = await client.hgetall(self._page_key(name, generation))
+        except Exception as e:
+            # Redis is an optimisation, serve from the database without it
+            self.errors += 1
+            logging.warning(f"Page cache unavailable: {e}")
+            return None, None
+        if not fields:
+            return generation, None
+        return generation, PageBlob(
+            hash=fields[b"hash"].decode(),
+            content_gzip=fields[b"gzip"],
+            content_br=fields[b"br"],
+        )
+
+    async def _l2_set(self, name: str, generation: int, blob: PageBlob):
+        key = self._page_key(name, generation)
+        mapping = {"hash": blob.hash, "gzip": blob.content_gzip, "br": blob.content_br}
+        try:
+            client = AsyncRedisClient.get_instance(decode_responses=False)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logging.warning(f"Failed to store page in cache: {e}")
+
+    async def _notify(self, name: Optional[str], data: Optional[dict]):
+        for listener in self._listeners:
+            try:
+                await listener(name, data)
+            except Exception as e:
+                handle_exception(e, "Page cache listener failed", source="page_cache")
+
+    async def _listen(self):
+        delay = 1
+        subscribed = False
+        while True:
+            pubsub = None
+            try:
+                pubsub = AsyncRedisClient.get_instance().pubsub()
+                await pubsub.subscribe(self.channel)
+                # Writes may have been missed while disconnected
+                self.evict()
+                if subscribed:
+                    await self._notify(None, None)
+                subscribed = True
+                delay = 1
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        message = json.loads(message["data"])
+                    except ValueError:
+                        # Bare page name from a process not yet upgraded
+                        message = {"name": message["data"], "data": None}
+                    self.evict(message["name"])
+                    await self._notify(message["name"], message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                handle_exception(e, "Page cache subscriber lost", source="page_cache")
+            finally:
+                if pubsub:
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+
+# Rendered pages by name, invalidated by set_page
+page_cache = PageCache()
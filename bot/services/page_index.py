@@ -0,0 +1,124 @@
+import random
+import threading
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class PageEntry:
+    """Handle to a page, content is resolved through the page cache"""
+
+    id: int
+    name: str
+    hash: Optional[str] = None
+    size: Optional[int] = None
+    weight: float = 1.0
+
+
+class AliasTable:
+    """Walker/Vose alias table for O(1) weighted sampling"""
+
+    def __init__(self, weights: List[float]):
+        n = len(weights)
+        total = sum(weights)
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng: random.Random = random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class PageIndex:
+    """In-process index of page handles used to pick random pages without the database"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name: dict[str, PageEntry] = {}
+        # Position of each selectable entry in the snapshot's entry list
+        self._positions: dict[str, int] = {}
+        # (entries, alias table) snapshot used by choice(). Writes that keep
+        # the weights replace or append entries in place, anything else builds
+        # a new snapshot and swaps it in a single assignment, so readers never
+        # need the lock
+        self._snapshot: Tuple[List[PageEntry], Optional[AliasTable]] = ([], None)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def load(self, entries: Iterable[PageEntry]):
+        """Replace the index contents"""
+        with self._lock:
+            self._by_name = {entry.name: entry for entry in entries}
+            self._rebuild()
+
+    def upsert(self, entry: PageEntry):
+        """Add or replace a single page"""
+        with self._lock:
+            old = self._by_name.get(entry.name)
+            self._by_name[entry.name] = entry
+            entries, table = self._snapshot
+            position = self._positions.get(entry.name)
+            if position is not None and old.weight == entry.weight:
+                entries[position] = entry
+            elif (
+                old is None
+                and table is None
+                and entry.weight > 0
+                and (not entries or entries[0].weight == entry.weight)
+            ):
+                # Still uniform, a new page needs no alias table
+                self._positions[entry.name] = len(entries)
+                entries.append(entry)
+            elif old is None and entry.weight <= 0:
+                pass
+            else:
+                self._rebuild()
+
+    def remove(self, name: str):
+        """Remove a page by name"""
+        with self._lock:
+            if self._by_name.pop(name, None) is not None and name in self._positions:
+                self._rebuild()
+
+    def get(self, name: str) -> Optional[PageEntry]:
+        """Get a page by name"""
+        return self._by_name.get(name)
+
+    def choice(self) -> Optional[PageEntry]:
+        """Pick a page at random, honouring weights"""
+        entries, table = self._snapshot
+        if not entries:
+            return None
+        if table is None:
+            return random.choice(entries)
+        return entries[table.sample()]
+
+    def _rebuild(self):
+        entries = [entry for entry in self._by_name.values() if entry.weight > 0]
+        weights = [entry.weight for entry in entries]
+        # Uniform weights need no alias table
+        if entries and any(w != weights[0] for w in weights):
+            table = AliasTable(weights)
+        else:
+            table = None
+        self._positions = {entry.name: i for i, entry in enumerate(entries)}
+        self._snapshot = (entries, table)
+
+
+page_index = PageIndex()
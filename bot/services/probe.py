@@ -0,0 +1,77 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, Optional
+
+import httpx
+
+from core.config import PROBE_CONCURRENCY, PROBE_TIMEOUT
+from core.http import HttpClient
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    url: str
+    ok: bool
+    status: Optional[int] = None
+    latency: Optional[float] = None  # milliseconds
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        result = {
+            self.url: "success" if self.ok else "failed",
+            "status": self.status,
+            "latency": self.latency,
+        }
+        if self.error:
+            result["message"] = self.error
+        return result
+
+
+async def probe(
+    url: str,
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: float = PROBE_TIMEOUT,
+) -> ProbeResult:
+    """Probe a single URL"""
+    client = client or HttpClient.get_instance()
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, timeout=timeout)
+    except Exception as e:
+        latency = round((time.perf_counter() - start) * 1000, 2)
+        return ProbeResult(url, False, latency=latency, error=str(e) or type(e).__name__)
+
+    latency = round((time.perf_counter() - start) * 1000, 2)
+    if response.status_code != 200:
+        return ProbeResult(
+            url,
+            False,
+            response.status_code,
+            latency,
+            error=f"status: {response.status_code}",
+        )
+    return ProbeResult(url, True, response.status_code, latency)
+
+
+async def probe_many(
+    urls: Iterable[str],
+    concurrency: int = PROBE_CONCURRENCY,
+    timeout: float = PROBE_TIMEOUT,
+) -> AsyncIterator[ProbeResult]:
+    """Probe URLs concurrently, yielding results as they complete"""
+    client = HttpClient.get_instance()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(url: str) -> ProbeResult:
+        async with semaphore:
+            return await probe(url, client, timeout)
+
+    tasks = [asyncio.create_task(bounded(url)) for url in dict.fromkeys(urls)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # The consumer may stop early, e.g. a streaming client disconnects
+        for task in tasks:
+            task.cancel()
@@ -1,92 +1,163 @@
-import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
 import uuid
 
-import httpx
-
+from bot.services.monitor import format_health, health_monitor
+from bot.services.probe import ProbeResult, probe_many
 from core.exceptions import handle_exception
-from core.redis import redis_client
-
-
-def get_cf_node():
-    """Get CF nodes"""
-    data = redis_client.smembers("cf_node")
+from core.redis import async_redis_client
+from core.redis_cache import redis_cache
+
+
+# Snapshot field => (command, key) of every known config key
+CONFIG_KEYS = {
+    "admin": ("get", "admin"),
+    "user": ("smembers", "user"),
+    "path": ("hgetall", "path"),
+    "cf_node": ("smembers", "cf_node"),
+    "alive": ("smembers", "alive"),
+    "node": ("hgetall", "node"),
+    "deploy_url": ("get", "deploy_url"),
+    "dashboard": ("get", "dashboard"),
+    "page": ("smembers", "page"),
+}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    admin: Optional[str] = None
+    user: set[str] = field(default_factory=set)
+    path: dict[str, str] = field(default_factory=dict)
+    cf_node: set[str] = field(default_factory=set)
+    alive: set[str] = field(default_factory=set)
+    node: dict[str, str] = field(default_factory=dict)
+    deploy_url: Optional[str] = None
+    dashboard: Optional[str] = None
+    page: set[str] = field(default_factory=set)
+
+
+async def get_config_snapshot(*fields: str) -> ConfigSnapshot:
+    """Read config keys in a single MULTI round-trip, all of them by default"""
+    fields = fields or tuple(CONFIG_KEYS)
+    async with async_redis_client.pipeline(transaction=True) as pipe:
+        for name in fields:
+            command, key = CONFIG_KEYS[name]
+            getattr(pipe, command)(key)
+        results = await pipe.execute()
+
+    data = {}
+    for name, value in zip(fields, results):
+        # RESP2 and RESP3 disagree on set/list types
+        if CONFIG_KEYS[name][0] == "smembers":
+            value = set(value or ())
+        data[name] = value
+    return ConfigSnapshot(**data)
+
+
+def format_cf_node(data) -> str:
     result = "\n".join(data)
     return f"cf_node: [\n{result}\n]"
 
 
-def get_path():
-    """Get huggingface paths"""
-    data = redis_client.hgetall("path")
+def format_path(data: dict) -> str:
     result = "\n".join([f"{key}=>{value}" for key, value in data.items()])
     return f"path: [\n{result}\n]"
 
 
-def get_access_granted_users():
-    """Get access granted users"""
-    data = redis_client.smembers("user")
+def format_access_granted_users(data) -> str:
     result = ";".join(data)
     return f"user: {result}"
 
 
-async def get_all_config():
-    """Get all configurations"""
-    user = get_access_granted_users()
-    path = get_path()
-    cf_node = get_cf_node()
-    alive_url = get_alive_url()
-    node = await get_node()
-    web = f"web: {get_deploy_url()}"
-    dashboard = await get_dashboard()
-    return f'{user}\n{path}\n{cf_node}\n{alive_url}\n{node}\n{web}\n{dashboard}'
-        
+def format_alive_url(data) -> str:
+    if not data:
+        return "alive url is not set"
+    text = "\n".join(data)
+    return f"alive: [\n{text}\n]"
+
+
+def format_node(data: dict) -> str:
+    result = "=".join([f"{key}" for key, value in data.items()])
+    return f"node: [\n{result}\n]"
 
 
+def format_dashboard(data) -> str:
+    return f"dashboard: {data}"
+
+
+async def get_cf_node():
+    """Get CF nodes"""
+    return format_cf_node(await async_redis_client.smembers("cf_node"))
 
-def get_alive_url():
+
+async def get_path():
+    """Get huggingface paths"""
+    return format_path(await redis_cache.hgetall("path"))
+
+
+async def get_access_granted_users():
+    """Get access granted users"""
+    return format_access_granted_users(await redis_cache.smembers("user"))
+
+
+async def get_all_config():
+    """Get all configurations"""
+    config = await get_config_snapshot()
+    return "\n".join(
+        [
+            format_access_granted_users(config.user),
+            format_path(config.path),
+            format_cf_node(config.cf_node),
+            format_alive_url(config.alive),
+            format_node(config.node),
+            f"web: {config.deploy_url}",
+            format_dashboard(config.dashboard),
+        ]
+    )
+
+
+async def get_alive_url():
     """Get alive url"""
-    url = redis_client.smembers("alive")
-    if not url:
-        return "alive url is not set"
-    text = "\n".join(url)
-    return f"alive: [\n{text}\n]"
+    return format_alive_url(await async_redis_client.smembers("alive"))
 
 
-def get_restart_uuid():
+async def get_restart_uuid():
     """Get restart uuid"""
     restart_uuid = uuid.uuid4()
-    redis_client.set("restart_uuid", f"{restart_uuid}")
+    await async_redis_client.set("restart_uuid", f"{restart_uuid}")
     return restart_uuid
 
 
-def get_deploy_url():
+async def get_deploy_url():
     """Get deploy url"""
-    deploy_url = redis_client.get("deploy_url")
+    deploy_url = await redis_cache.get("deploy_url")
     return deploy_url
 
 
-async def check_web_status(url: str, client: httpx.AsyncClient) -> str:
-    """Check single URL status"""
-    try:
-        response = await client.get(url)
-        if response.status_code != 200:
-            return f"{url} is error, status: {response.status_code}\n"
-        return f"{url} is ok\n"
-    except Exception as e:
-        return f"{url} is error: {str(e)}\n"
+def format_web_status(result: ProbeResult) -> str:
+    """Format a single URL status"""
+    if result.ok:
+        return f"{result.url} is ok\n"
+    if result.status is not None:
+        return f"{result.url} is error, status: {result.status}\n"
+    return f"{result.url} is error: {result.error}\n"
 
 
 async def get_web_status() -> str:
     """Get status of all web URLs"""
+    # Answer from the background monitor once it has results
+    summary = health_monitor.summary()
+    if summary:
+        return format_health(summary)
+
     try:
-        urls = redis_client.smembers("alive")
+        urls = await async_redis_client.smembers("alive")
         if not urls:
             return "Keep alive urls is not been set"
 
-        """Concurrently check all URLs"""
-        async with httpx.AsyncClient() as client:
-            tasks = [check_web_status(url, client) for url in urls]
-            results = await asyncio.gather(*tasks)
-        return "".join(results)
+        # Concurrently check all URLs on the shared client
+        results = [result async for result in probe_many(urls)]
+        return "".join(format_web_status(result) for result in results)
 
     except Exception as e:
         handle_exception(e, message="Failed to get web status", source="web")
@@ -95,12 +166,9 @@ async def get_web_status() -> str:
 
 async def get_node():
     """Get nodes"""
-    data = redis_client.hgetall("node")
-    result = "=".join([f"{key}" for key, value in data.items()])
-    return f"node: [\n{result}\n]"
+    return format_node(await redis_cache.hgetall("node"))
 
 
 async def get_dashboard():
     """Get dashboard"""
-    data = redis_client.get("dashboard")
-    return f"dashboard: {data}"
+    return format_dashboard(await redis_cache.get("dashboard"))
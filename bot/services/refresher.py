@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+from bot.services.fetcher import fetch_page
+from bot.services.page import (
+    list_url_pages,
+    publish_pages,
+    set_content,
+    set_validators,
+)
+from bot.services.page_cache import compress_content
+from core.config import (
+    PAGE_LIST_LIMIT,
+    PAGE_REFRESH_CONCURRENCY,
+    PAGE_REFRESH_HOST_CONCURRENCY,
+    PAGE_REFRESH_HOST_DELAY,
+)
+from core.db import async_session
+from core.exceptions import handle_exception
+from model.page import Page
+
+
+class HostLimiter:
+    """Limit concurrent requests per host and space them out by delay seconds"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.delay = delay
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(concurrency))
+        self._next_at: dict[str, float] = defaultdict(float)
+
+    @asynccontextmanager
+    async def acquire(self, host: str):
+        async with self._semaphores[host]:
+            wait = self._next_at[host] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                yield
+            finally:
+                self._next_at[host] = time.monotonic() + self.delay
+
+
+class PageRefresher:
+    """
+    Re-fetch URL-backed pages with conditional requests.
+
+    run() is scheduled by the web app. Upstreams that answer 304, or return
+    the same body, cost no database write and no cache invalidation.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = PAGE_REFRESH_CONCURRENCY,
+        host_concurrency: int = PAGE_REFRESH_HOST_CONCURRENCY,
+        host_delay: float = PAGE_REFRESH_HOST_DELAY,
+    ):
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.host_delay = host_delay
+        self.counts: dict[str, int] = defaultdict(int)
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+    async def run(self):
+        """Refresh every URL-backed page once"""
+        start = time.monotonic()
+        # Per run, semaphores are bound to the running loop
+        hosts = HostLimiter(self.host_concurrency, self.host_delay)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        after = 0
+        while True:
+            async with async_session() as session:
+                rows = await list_url_pages(session, after, PAGE_LIST_LIMIT)
+            await asyncio.gather(
+                *(self.refresh(row, hosts, semaphore) for row in rows)
+            )
+            if len(rows) < PAGE_LIST_LIMIT:
+                break
+            after = rows[-1].id
+        self.last_run = time.time()
+        self.last_duration = round(time.monotonic() - start, 3)
+        logging.info(f"Page refresh finished: {dict(self.counts)}")
+
+    async def refresh(self, row, hosts: HostLimiter, semaphore: asyncio.Semaphore):
+        """Conditionally re-fetch one page and store it if its content changed"""
+        try:
+            # Host first, so pages waiting on a busy host don't hold a slot
+            async with hosts.acquire(urlsplit(row.url).hostname or ""), semaphore:
+                result = await fetch_page(row.url, row.etag, row.last_modified)
+            if result.error:
+                self.counts["failed"] += 1
+                return
+            if result.not_modified:
+                self.counts["not_modified"] += 1
+                return
+
+            changed = row.hash != result.hash
+            validators = (result.etag, result.last_modified)
+            if not changed and validators == (row.etag, row.last_modified):
+                self.counts["unchanged"] += 1
+                return
+
+            blob = None
+            if changed:
+                # Off the web loop, and before a pooled connection is checked out
+                blob = await asyncio.to_thread(compress_content, result.content)
+
+            async with async_session() as session:
+                page = await session.get(Page, row.id)
+                # Deleted or pointed elsewhere while we were fetching
+                if page is None or page.url != row.url:
+                    return
+                set_validators(page, result)
+                if changed:
+                    await set_content(session, page, result.content, blob)
+                session.add(page)
+                await session.commit()
+
+            if changed:
+                await publish_pages(page)
+                self.counts["updated"] += 1
+            else:
+                # New validators only, the cached body is still current
+                self.counts["unchanged"] += 1
+        except Exception as e:
+            self.counts["failed"] += 1
+            handle_exception(e, f"Failed to refresh page {row.name}", source="refresher")
+
+    def stats(self) -> dict:
+        return {
+            **self.counts,
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+        }
+
+
+page_refresher = PageRefresher()
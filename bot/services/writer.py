@@ -1,15 +1,20 @@
-from core.redis import redis_client
+from core.redis import async_redis_client
+from core.redis_cache import redis_cache
 
 
 async def set_access_granted_user(user_id):
     """Add user to access granted list"""
-    return redis_client.sadd("user", str(user_id))
+    result = await async_redis_client.sadd("user", str(user_id))
+    redis_cache.invalidate("user")
+    return result
 
 
 async def set_cf_node(data: str):
     """Set CF nodes"""
     nodes = data.strip().split(";")
-    return redis_client.sadd("cf_node", *nodes)
+    result = await async_redis_client.sadd("cf_node", *nodes)
+    redis_cache.invalidate("cf_node")
+    return result
 
 
 async def set_path(data: str):
@@ -18,18 +23,24 @@ async def set_path(data: str):
     for item in data.strip().split(";"):
         key, value = item.split("-", 1)
         path[key] = value
-    return redis_client.hset("path", mapping=path)
+    result = await async_redis_client.hset("path", mapping=path)
+    redis_cache.invalidate("path")
+    return result
 
 
 async def set_alive_url(url: list):
     """Set alive URL"""
     url = url.strip().split(";")
-    return redis_client.sadd("alive", *url)
+    result = await async_redis_client.sadd("alive", *url)
+    redis_cache.invalidate("alive")
+    return result
 
 
 async def set_deploy_url(url: str):
     """Set deploy URL"""
-    return redis_client.set("deploy_url", url)
+    result = await async_redis_client.set("deploy_url", url)
+    redis_cache.invalidate("deploy_url")
+    return result
 
 
 async def set_node(data: str):
@@ -40,9 +51,13 @@ async def set_node(data: str):
     for item in data:
         key, value = item.split("-", 1)
         nodes[key] = value
-    return redis_client.hset("node", mapping=nodes)
+    result = await async_redis_client.hset("node", mapping=nodes)
+    redis_cache.invalidate("node")
+    return result
 
 
 async def set_dashboard(data: str):
     """Set dashboard"""
-    return redis_client.set("dashboard", data)
+    result = await async_redis_client.set("dashboard", data)
+    redis_cache.invalidate("dashboard")
+    return result
@@ -0,0 +1,41 @@
+import asyncio
+import functools
+import time
+from typing import Callable
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from core.metrics import bot_latency, bot_updates
+
+
+def track_handler(func: Callable) -> Callable:
+    """
+    Decorator recording handler latency and outcome
+    Args:
+        func: Handler to be decorated, put it above admin_required so
+            rejected calls are counted too
+    Returns:
+        Wrapped handler
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(
+        update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs
+    ):
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            return await func(update, context, *args, **kwargs)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            bot_latency.observe(time.perf_counter() - start, name)
+            bot_updates.inc(name, status)
+
+    return wrapper
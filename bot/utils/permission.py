@@ -4,14 +4,33 @@ from typing import Callable
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from core.config import ADMIN_ID
-from core.redis import redis_client
+from core.cache import LRUCache
+from core.config import ADMIN_ID, PERMISSION_CACHE_TTL
+from core.redis_cache import redis_cache
 
-# Get admin ID from Redis or config
-admin_id = int(redis_client.get("admin") or ADMIN_ID)
+# (user_id, admin, access_granted_user) => decision
+_decisions = LRUCache(1024, ttl=PERMISSION_CACHE_TTL)
+# Bumped on every clear so checks racing with a grant don't cache stale decisions
+_generation = 0
 
 
-def has_permission(user_id: int, admin=True, access_granted_user=False) -> bool:
+def _on_invalidate(keys: tuple):
+    global _generation
+    if not keys or {"admin", "user"} & set(keys):
+        _generation += 1
+        _decisions.clear()
+
+
+# Grants written from any process drop cached decisions
+redis_cache.add_listener(_on_invalidate)
+
+
+async def get_admin_id() -> int:
+    """Get admin ID from Redis or config"""
+    return int(await redis_cache.get("admin") or ADMIN_ID)
+
+
+async def has_permission(user_id: int, admin=True, access_granted_user=False) -> bool:
     """
     Check if user has required permissions
     Args:
@@ -21,15 +40,24 @@ def has_permission(user_id: int, admin=True, access_granted_user=False) -> bool:
     Returns:
         bool: True if user has permission, False otherwise
     """
+    key = (user_id, admin, access_granted_user)
+    decision = _decisions.get(key)
+    if decision is not None:
+        return decision
+
+    generation = _generation
+    decision = False
     if access_granted_user:
-        if str(user_id) in redis_client.smembers("user"):
-            return True
+        if await redis_cache.sismember("user", str(user_id)):
+            decision = True
 
-    if admin:
-        if user_id == admin_id:
-            return True
+    if admin and not decision:
+        if user_id == await get_admin_id():
+            decision = True
 
-    return False
+    if generation == _generation:
+        _decisions.set(key, decision)
+    return decision
 
 
 async def not_allow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -58,7 +86,7 @@ def admin_required(func: Callable) -> Callable:
     async def wrapper(
         update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs
     ):
-        if not has_permission(update.effective_chat.id):
+        if not await has_permission(update.effective_chat.id):
             return await not_allow(update, context)
         return await func(update, context, *args, **kwargs)
 
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Awaitable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from core.stats import LatencyWindow
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Process updates concurrently while keeping each chat's updates in order.
+    An update takes its chat's turn before a concurrency slot, so updates
+    queued behind a slow handler don't hold slots other chats could use.
+    This overrides PTB's process_update, which is marked @final, because the
+    base class takes its semaphore before do_process_update is called.
+
+    PTB hands every update to process_update as soon as it is fetched, so
+    updates waiting for their turn are counted in waiting, the real queue
+    depth behind update_queue.
+    Args:
+        max_concurrent_updates: Number of updates processed at the same time
+        handler_timeout: Seconds an update may take before it is cancelled
+    """
+
+    def __init__(self, max_concurrent_updates: int, handler_timeout: Optional[float]):
+        super().__init__(max_concurrent_updates)
+        self.handler_timeout = handler_timeout
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        # asyncio.Lock wakes waiters in FIFO order, which keeps a chat's order
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._chat_waiters: dict[int, int] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latency = LatencyWindow()
+
+    async def process_update(self, update: object, coroutine: Awaitable):
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is not None:
+            lock = self._chat_locks.setdefault(chat.id, asyncio.Lock())
+            self._chat_waiters[chat.id] = self._chat_waiters.get(chat.id, 0) + 1
+
+        self.waiting += 1
+        try:
+            async with AsyncExitStack() as stack:
+                try:
+                    if chat is not None:
+                        await stack.enter_async_context(lock)
+                    await stack.enter_async_context(self._slots)
+                finally:
+                    self.waiting -= 1
+                await self.do_process_update(update, coroutine)
+        finally:
+            if chat is not None:
+                self._chat_waiters[chat.id] -= 1
+                if not self._chat_waiters[chat.id]:
+                    del self._chat_waiters[chat.id]
+                    del self._chat_locks[chat.id]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable):
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(coroutine, timeout=self.handler_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logging.warning(f"Update handler timed out after {self.handler_timeout}s")
+        except Exception:
+            # Handler errors are reported by the application's error handling
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.latency.add(round((time.perf_counter() - start) * 1000, 2))
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "chats": len(self._chat_locks),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "latency_ms": self.latency.summary(),
+        }
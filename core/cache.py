@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with optional expiry.
+
+    maxsize bounds the number of entries, or their total weight when a weigher
+    is given, e.g. a byte size. Entries heavier than maxsize are not kept.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        weigher: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigher = weigher
+        self.weight = 0
+        # key => (value, expires_at or None, weight)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at, weight = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.weight -= weight
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        weight = self.weigher(value) if self.weigher else 1
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.weight -= old[2]
+            if weight > self.maxsize:
+                return
+            self._data[key] = (value, expires_at, weight)
+            self.weight += weight
+            while self.weight > self.maxsize:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.weight -= evicted
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self.weight -= item[2]
+        return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
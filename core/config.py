@@ -19,6 +19,11 @@ REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_PROTOCOL = int(os.getenv("REDIS_PROTOCOL", 3))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
+# In-process cache of hot config keys, kept coherent with CLIENT TRACKING.
+# Entries expire after REDIS_CACHE_TTL seconds while tracking is unavailable.
+REDIS_CACHE_SIZE = int(os.getenv("REDIS_CACHE_SIZE", 256))
+REDIS_CACHE_TTL = float(os.getenv("REDIS_CACHE_TTL", 5))
+REDIS_CACHE_TRACKING_TTL = float(os.getenv("REDIS_CACHE_TRACKING_TTL", 300))
 
 # MySQL configuration
 MYSQL_HOST = os.getenv("MYSQL_HOST", "mysql")
@@ -27,17 +32,96 @@ MYSQL_USER = os.getenv("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "root")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE", "mybot")
 MYSQL_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+# Async driver URL, can point at e.g. sqlite+aiosqlite:// for tests
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}",
+)
+# Connection pool of the async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle before MySQL's wait_timeout or a proxy closes idle connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 
 # Telegram configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+# Update ingestion: "polling" or "webhook", webhook falls back to polling
+# when WEBHOOK_URL/WEBHOOK_SECRET are missing or registration fails
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", 100))
+# Updates processed concurrently (each chat stays in order) and the per-update timeout
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", 8))
+BOT_HANDLER_TIMEOUT = float(os.getenv("BOT_HANDLER_TIMEOUT", 60))
+# Run the bot on the uvicorn event loop instead of a dedicated thread
+BOT_SHARED_LOOP = os.getenv("BOT_SHARED_LOOP", "false").lower() in ("1", "true", "yes")
+
+# Outbound Telegram send queue, Bot API allows ~30 msg/s overall and 1 msg/s per chat
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+TELEGRAM_SEND_WORKERS = int(os.getenv("TELEGRAM_SEND_WORKERS", 8))
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", 1000))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", 3))
 
 # Admin ID
 ADMIN_ID = int(os.getenv("ADMIN_ID", "123456789"))
+# Admin error notifications
+NOTIFY_DIGEST_INTERVAL = float(os.getenv("NOTIFY_DIGEST_INTERVAL", 300))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 100))
+NOTIFY_MAX_FINGERPRINTS = int(os.getenv("NOTIFY_MAX_FINGERPRINTS", 200))
+# Seconds a per-user permission decision is reused
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", 10))
 
 # Web service configuration
 WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
 WEB_PORT = int(os.getenv("WEB_PORT", 8000))
 INTERVAL_TIME = int(os.getenv("INTERVAL_TIME", 60))
+# Bytes of rendered pages kept in process, all variants of a page counted
+PAGE_CACHE_BYTES = int(os.getenv("PAGE_CACHE_BYTES", 64 * 1024 * 1024))
+# Lifetime of page bodies in the shared Redis cache
+PAGE_REDIS_TTL = int(os.getenv("PAGE_REDIS_TTL", 86400))
+# Brotli quality of stored pages, 11 takes seconds on multi-megabyte pages
+PAGE_BROTLI_QUALITY = int(os.getenv("PAGE_BROTLI_QUALITY", 5))
+# Re-fetch URL-backed pages every PAGE_REFRESH_INTERVAL seconds, 0 disables
+PAGE_REFRESH_INTERVAL = float(os.getenv("PAGE_REFRESH_INTERVAL", 3600))
+PAGE_REFRESH_CONCURRENCY = int(os.getenv("PAGE_REFRESH_CONCURRENCY", 8))
+# Politeness towards each upstream host
+PAGE_REFRESH_HOST_CONCURRENCY = int(os.getenv("PAGE_REFRESH_HOST_CONCURRENCY", 1))
+PAGE_REFRESH_HOST_DELAY = float(os.getenv("PAGE_REFRESH_HOST_DELAY", 1))
+# Fetching page content from URLs
+PAGE_FETCH_MAX_BYTES = int(os.getenv("PAGE_FETCH_MAX_BYTES", 5 * 1024 * 1024))
+PAGE_FETCH_TIMEOUT = float(os.getenv("PAGE_FETCH_TIMEOUT", 30))
+PAGE_FETCH_CONTENT_TYPES = frozenset(
+    os.getenv("PAGE_FETCH_CONTENT_TYPES", "text/html,application/xhtml+xml,text/plain").split(",")
+)
+# Bulk page import
+PAGE_IMPORT_CONCURRENCY = int(os.getenv("PAGE_IMPORT_CONCURRENCY", 16))
+PAGE_IMPORT_MAX_ITEMS = int(os.getenv("PAGE_IMPORT_MAX_ITEMS", 1000))
+PAGE_IMPORT_MAX_BYTES = int(os.getenv("PAGE_IMPORT_MAX_BYTES", 1024 * 1024))
+# Default and maximum rows per page listing batch
+PAGE_LIST_LIMIT = int(os.getenv("PAGE_LIST_LIMIT", 100))
+PAGE_LIST_MAX_LIMIT = int(os.getenv("PAGE_LIST_MAX_LIMIT", 1000))
+
+# Outbound HTTP configuration
+HTTP2 = os.getenv("HTTP2", "true").lower() in ("1", "true", "yes")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+
+# Alive probe configuration
+PROBE_CONCURRENCY = int(os.getenv("PROBE_CONCURRENCY", 20))
+PROBE_TIMEOUT = float(os.getenv("PROBE_TIMEOUT", 10))
+
+# Background health monitor of the alive URLs
+MONITOR_INTERVAL = float(os.getenv("MONITOR_INTERVAL", INTERVAL_TIME))
+MONITOR_JITTER = float(os.getenv("MONITOR_JITTER", 0.1))
+MONITOR_HISTORY = int(os.getenv("MONITOR_HISTORY", 100))
 
 # 日志配置
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
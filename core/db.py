@@ -1,10 +1,190 @@
-from sqlmodel import Session, create_engine
+import asyncio
+import threading
+import time
+import weakref
 
-from core.config import MYSQL_URL
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-engine = create_engine(MYSQL_URL)
+from core.config import (
+    ASYNC_DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+from core.metrics import db_latency, db_queries, registry, statement_operation
+from core.stats import LatencyWindow
 
 
-def get_session():
-    with Session(engine) as session:
+class PoolStats:
+    """Checkout, wait and invalidation counters for a group of pools"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: "weakref.WeakSet[QueuePool]" = weakref.WeakSet()
+        self.waits = LatencyWindow()
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def attach(self, pool: QueuePool):
+        self._pools.add(pool)
+        pool._stats = self
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "soft_invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        # Invalidated connections are checked in without a DBAPI connection
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def on_wait(self, elapsed: float, timed_out: bool = False):
+        self.waits.add(round(elapsed * 1000, 2))
+        if timed_out:
+            with self._lock:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pools = list(self._pools)
+        with self._lock:
+            return {
+                "pools": len(pools),
+                "size": sum(pool.size() for pool in pools),
+                "idle": sum(pool.checkedin() for pool in pools),
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                # Negative while the pool has not filled up to pool_size yet
+                "overflow": sum(max(0, pool.overflow()) for pool in pools),
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": self.waits.summary(),
+            }
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Time how long checkouts wait for a free connection"""
+
+    _stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self._stats.on_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self._stats.on_wait(time.perf_counter() - start)
+        return connection
+
+
+def instrument_engine(sync_engine, name: str):
+    """Record statement latency of an engine, async engines pass their sync_engine"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = statement_operation(statement)
+        db_latency.observe(time.perf_counter() - context._query_start, name, operation)
+        db_queries.inc(name, operation, "ok")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        operation = statement_operation(exception_context.statement)
+        db_queries.inc(name, operation, "error")
+
+
+def _pool_kwargs() -> dict:
+    return dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+# Migrations build their own engine from MYSQL_URL, the app only uses async ones
+pool_stats = {"async": PoolStats()}
+
+
+class AsyncDatabase:
+    """Async engine per event loop, driver connections can't cross loops"""
+
+    _engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    @classmethod
+    def get_engine(cls) -> AsyncEngine:
+        loop = asyncio.get_running_loop()
+        async_engine = cls._engines.get(loop)
+        if async_engine is None:
+            async_engine = cls._engines[loop] = create_async_engine(
+                ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **_pool_kwargs()
+            )
+            pool_stats["async"].attach(async_engine.sync_engine.pool)
+            instrument_engine(async_engine.sync_engine, "async")
+        return async_engine
+
+    @classmethod
+    async def dispose(cls):
+        """Dispose the engine of the running loop"""
+        async_engine = cls._engines.pop(asyncio.get_running_loop(), None)
+        if async_engine:
+            await async_engine.dispose()
+
+
+def async_session() -> AsyncSession:
+    # Objects stay readable after commit, async sessions can't lazy load
+    return AsyncSession(AsyncDatabase.get_engine(), expire_on_commit=False)
+
+
+async def get_async_session():
+    async with async_session() as session:
         yield session
+
+
+def get_pool_stats() -> dict:
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+
+registry.gauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    ("engine", "state"),
+    lambda: {
+        (name, state): snapshot[state]
+        for name, snapshot in get_pool_stats().items()
+        for state in ("in_use", "idle", "overflow")
+    },
+)
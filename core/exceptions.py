@@ -1,12 +1,18 @@
 import logging
 import traceback
-from typing import Callable, Optional
+
+from core.cache import LRUCache
+from core.config import NOTIFY_DIGEST_INTERVAL
+from core.notifier import admin_notifier
+
+# Fingerprints whose full traceback was logged recently
+_logged = LRUCache(1024, ttl=NOTIFY_DIGEST_INTERVAL)
 
 
 def handle_exception(
     e: Exception,
     message: str = "An error occurred",
-    notify_func: Optional[Callable[[str], None]] = None,
+    notify: bool = False,
     source: str = "app",
 ):
     """
@@ -14,30 +20,35 @@ def handle_exception(
     Args:
         e: The exception
         message: Custom error message
-        notify_func: Optional function to send notification
+        notify: Notify the admin chat, repeats are sent as a periodic digest
         source: Source of the error (bot/web)
     """
-    # Get full traceback
-    error_traceback = "".join(traceback.format_tb(e.__traceback__))
-
     # Get original error location (for brief display)
-    tb = traceback.extract_tb(e.__traceback__)[-1]
-    error_location = f'File "{tb.filename}", line {tb.lineno}, in {tb.name}'
-
-    # Combine error message
-    error_message = (
-        f"{message}: {str(e)}\n"
-        f"Location: {error_location}\n"
-        f"Full traceback:\n{error_traceback}"
-    )
+    frames = traceback.extract_tb(getattr(e, "__traceback__", None))
+    if frames:
+        tb = frames[-1]
+        error_location = f'File "{tb.filename}", line {tb.lineno}, in {tb.name}'
+    else:
+        error_location = "unknown"
+    fingerprint = f"{type(e).__name__}|{error_location}"
+    summary = f"[{source}] {message}: {type(e).__name__} at {error_location}"
 
-    # Log the error directly using error logger with source
+    # Repeats within the digest interval only log one line
     extra = {"source": source}
-    logging.error(error_message, extra=extra)
+    if _logged.get(fingerprint):
+        logging.error(f"{message}: {str(e)} (repeated, at {error_location})", extra=extra)
+    else:
+        _logged.set(fingerprint, True)
+        error_traceback = "".join(traceback.format_tb(getattr(e, "__traceback__", None)))
+        error_message = (
+            f"{message}: {str(e)}\n"
+            f"Location: {error_location}\n"
+            f"Full traceback:\n{error_traceback}"
+        )
+        logging.error(error_message, extra=extra)
 
-    # Send notification if function provided
-    if notify_func:
-        try:
-            notify_func(error_message)
-        except Exception as notify_error:
-            logging.error(f"Failed to send notification: {notify_error}", source=source)
+    # Only enqueues, never blocks the failing request
+    if notify:
+        admin_notifier.notify_error(
+            fingerprint, summary, f"{message}: {str(e)}\nLocation: {error_location}"
+        )
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import weakref
+from collections import defaultdict
+
+import httpx
+
+from core.config import (
+    HTTP2,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_TIMEOUT,
+)
+
+
+class ConnectionStats:
+    """Per-host request and new connection counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[str, int] = defaultdict(int)
+        self._connections: dict[str, int] = defaultdict(int)
+
+    def on_request(self, host: str):
+        with self._lock:
+            self._requests[host] += 1
+
+    def on_connect(self, host: str):
+        with self._lock:
+            self._connections[host] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hosts = sorted(self._requests)
+            result = {}
+            for host in hosts:
+                requests = self._requests[host]
+                connections = self._connections[host]
+                result[host] = {
+                    "requests": requests,
+                    "connections": connections,
+                    "reuse_rate": round(1 - connections / requests, 4) if requests else None,
+                }
+            return result
+
+
+class HttpClient:
+    """
+    Managed outbound HTTP clients.
+
+    get_instance() returns a pooled AsyncClient for the running loop, since
+    async connections are bound to the loop that opened them. Clients
+    negotiate HTTP/2 where the server supports it.
+    """
+
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+        weakref.WeakKeyDictionary()
+    )
+    stats = ConnectionStats()
+
+    @classmethod
+    def get_instance(cls) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None or client.is_closed:
+            client = cls._create_client()
+            cls._clients[loop] = client
+        return client
+
+    @classmethod
+    def _create_client(cls) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            event_hooks={"request": [cls._trace_async]}, **cls._client_kwargs()
+        )
+
+    @staticmethod
+    def _client_kwargs() -> dict:
+        return {
+            "http2": HTTP2,
+            "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        }
+
+    @classmethod
+    async def _trace_async(cls, request: httpx.Request):
+        host = request.url.host
+        cls.stats.on_request(host)
+
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                cls.stats.on_connect(host)
+
+        request.extensions["trace"] = trace
+
+    @classmethod
+    async def close(cls):
+        """Close the client of the running loop"""
+        client = cls._clients.pop(asyncio.get_running_loop(), None)
+        if client:
+            await client.aclose()
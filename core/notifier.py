@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import (
+    ADMIN_ID,
+    NOTIFY_DIGEST_INTERVAL,
+    NOTIFY_MAX_FINGERPRINTS,
+    NOTIFY_QUEUE_SIZE,
+    TELEGRAM_BOT_TOKEN,
+)
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+
+@dataclass
+class ErrorRecord:
+    summary: str
+    first_seen: float
+    # Occurrences since the last digest, the first one is sent right away
+    repeats: int = 0
+    total: int = 1
+
+
+class AdminNotifier:
+    """
+    Non-blocking notifications to the admin chat.
+
+    send() and notify_error() can be called from any thread and only enqueue.
+    A worker on the web loop delivers through the shared Telegram send queue.
+    Errors are fingerprinted: the first occurrence is sent immediately and
+    repeats are counted into a periodic digest.
+    """
+
+    def __init__(
+        self,
+        interval: float = NOTIFY_DIGEST_INTERVAL,
+        queue_size: int = NOTIFY_QUEUE_SIZE,
+        max_fingerprints: int = NOTIFY_MAX_FINGERPRINTS,
+    ):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_fingerprints = max_fingerprints
+        self.sent = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        self._records: dict[str, ErrorRecord] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def send(self, text: str, chat_id: Optional[int] = None):
+        """Queue a message, dropped when the queue is full or not running"""
+        loop = self._loop
+        if loop is None:
+            self.dropped += 1
+            return
+        try:
+            loop.call_soon_threadsafe(self._put, (text[:MAX_MESSAGE_LENGTH], chat_id))
+        except RuntimeError:
+            # Loop closed during shutdown
+            self.dropped += 1
+
+    def notify_error(self, fingerprint: str, summary: str, text: str):
+        """Send an error the first time it is seen, count it into the digest otherwise"""
+        with self._lock:
+            record = self._records.get(fingerprint)
+            if record is None and len(self._records) >= self.max_fingerprints:
+                # Too many distinct errors, fold the rest into one entry
+                fingerprint, summary = "other", "Other errors"
+                record = self._records.get(fingerprint)
+            if record is not None:
+                record.repeats += 1
+                record.total += 1
+                self.suppressed += 1
+                return
+            self._records[fingerprint] = ErrorRecord(summary, time.time())
+        self.send(text)
+
+    def digest(self) -> Optional[str]:
+        """Collect repeats since the last digest, quiet fingerprints are forgotten"""
+        with self._lock:
+            repeated = [record for record in self._records.values() if record.repeats]
+            self._records = {
+                fingerprint: record
+                for fingerprint, record in self._records.items()
+                if record.repeats
+            }
+            lines = [f"{record.repeats}x {record.summary}" for record in repeated]
+            for record in repeated:
+                record.repeats = 0
+        if not lines:
+            return None
+        return f"Repeated errors in the last {self.interval:g}s:\n" + "\n".join(lines)
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+            "fingerprints": len(self._records),
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+    async def start(self):
+        """Start delivering on the running loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [
+            asyncio.create_task(self._worker()),
+            asyncio.create_task(self._digest()),
+        ]
+
+    async def stop(self):
+        self._loop = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _put(self, item: tuple):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _worker(self):
+        from core.redis_cache import redis_cache
+        from core.telegram import telegram_sender
+
+        while True:
+            text, chat_id = await self._queue.get()
+            try:
+                if chat_id is None:
+                    chat_id = int(await redis_cache.get("admin") or ADMIN_ID)
+                result = await telegram_sender.send(TELEGRAM_BOT_TOKEN, chat_id, text)
+                if result.get("ok"):
+                    self.sent += 1
+                else:
+                    self.dropped += 1
+            except Exception as e:
+                # Not handle_exception, a failing sender would notify itself
+                self.dropped += 1
+                logging.warning(f"Failed to send admin notification: {e}")
+
+    async def _digest(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            text = self.digest()
+            if text:
+                self.send(text)
+
+
+admin_notifier = AdminNotifier()
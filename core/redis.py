@@ -1,6 +1,9 @@
-from typing import Optional
-import redis
-from redis.connection import SSLConnection
+import asyncio
+import time
+import weakref
+
+import redis.asyncio as aioredis
+from redis.asyncio.connection import SSLConnection as AsyncSSLConnection
 
 from core.config import (
     DEBUG,
@@ -9,59 +12,75 @@ from core.config import (
     REDIS_PROTOCOL,
     REDIS_PASSWORD,
 )
-from core.exceptions import handle_exception
+from core.metrics import command_name, redis_commands, redis_latency
 
 
-class RedisClient:
-    _instance: Optional[redis.Redis] = None
-    _pool: Optional[redis.ConnectionPool] = None
+def _redis_config(connection_class) -> dict:
+    """Connection settings of the asyncio clients"""
+    redis_config = {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "decode_responses": True,
+        "protocol": REDIS_PROTOCOL,
+    }
 
-    @classmethod
-    def get_instance(cls) -> Optional[redis.Redis]:
-        if cls._instance is None:
-            cls._instance = cls._create_client()
-        return cls._instance
+    if not DEBUG:
+        redis_config.update(
+            {"password": REDIS_PASSWORD, "connection_class": connection_class}
+        )
+    return redis_config
 
-    @classmethod
-    def _create_client(cls) -> Optional[redis.Redis]:
-        if cls._pool is None:
-            redis_config = {
-                "host": REDIS_HOST,
-                "port": REDIS_PORT,
-                "decode_responses": True,
-                "protocol": REDIS_PROTOCOL,
-            }
-
-            if not DEBUG:
-                redis_config.update(
-                    {"password": REDIS_PASSWORD, "connection_class": SSLConnection}
-                )
-
-            try:
-                cls._pool = redis.ConnectionPool(**redis_config)
-            except Exception as e:
-                handle_exception(
-                    f"Failed to create Redis pool: {e}", source="create_redis_pool"
-                )
-                return None
 
+class TimedAsyncRedis(aioredis.Redis):
+    """asyncio Redis client recording command latency, pipelines are not timed"""
+
+    async def execute_command(self, *args, **options):
+        command, status = command_name(args), "ok"
+        start = time.perf_counter()
         try:
-            return redis.Redis(connection_pool=cls._pool)
-        except Exception as e:
-            handle_exception(
-                f"Failed to create Redis client: {e}", source="create_redis_client"
-            )
-            return None
+            return await super().execute_command(*args, **options)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            redis_latency.observe(time.perf_counter() - start, "async", command)
+            redis_commands.inc("async", command, status)
+
+
+class AsyncRedisClient:
+    """asyncio Redis client with a shared connection pool per event loop"""
+
+    # {loop: {decode_responses: client}}
+    _instances: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[bool, aioredis.Redis]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    @classmethod
+    def get_instance(cls, decode_responses: bool = True) -> aioredis.Redis:
+        """Get the client of the running loop, pass decode_responses=False for binary values"""
+        # asyncio connections are bound to the loop that opened them
+        clients = cls._instances.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(decode_responses)
+        if client is None:
+            redis_config = _redis_config(AsyncSSLConnection)
+            redis_config["decode_responses"] = decode_responses
+            pool = aioredis.ConnectionPool(**redis_config)
+            client = clients[decode_responses] = TimedAsyncRedis(connection_pool=pool)
+        return client
 
     @classmethod
-    def close(cls):
-        """Close Redis connection"""
-        if cls._instance:
-            cls._instance.close()
-            cls._instance = None
-        if cls._pool:
-            cls._pool.disconnect()
-            cls._pool = None
+    async def close(cls):
+        """Close the clients and pools of the running loop"""
+        clients = cls._instances.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose(close_connection_pool=True)
+
+
+class AsyncRedisProxy:
+    """Forward commands to the asyncio client of the running loop"""
+
+    def __getattr__(self, name):
+        return getattr(AsyncRedisClient.get_instance(), name)
 
 
-redis_client = RedisClient.get_instance()
+async_redis_client = AsyncRedisProxy()
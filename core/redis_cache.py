@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from typing import Any, Callable, Iterable, Optional
+
+from redis.exceptions import ResponseError
+
+from core.cache import LRUCache
+from core.config import (
+    REDIS_CACHE_SIZE,
+    REDIS_CACHE_TRACKING_TTL,
+    REDIS_CACHE_TTL,
+)
+from core.exceptions import handle_exception
+from core.redis import AsyncRedisClient, async_redis_client
+
+# Keys that are read on almost every request but only change through the writer
+CACHED_KEYS = ("admin", "user", "deploy_url", "dashboard", "node", "path")
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+COMMANDS = ("get", "smembers", "hgetall")
+_MISSING = object()
+
+
+class TrackedCache:
+    """
+    Client-side cache of Redis keys.
+
+    A background connection enables CLIENT TRACKING in broadcast mode for the
+    cached keys and redirects invalidations to itself, so writes from any
+    process evict local entries. Without tracking, entries fall back to a
+    short TTL.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = CACHED_KEYS,
+        maxsize: int = REDIS_CACHE_SIZE,
+        ttl: float = REDIS_CACHE_TTL,
+        tracking_ttl: float = REDIS_CACHE_TRACKING_TTL,
+    ):
+        self.keys = frozenset(keys)
+        self.ttl = ttl
+        self.tracking_ttl = tracking_ttl
+        self.tracking = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._cache = LRUCache(maxsize)
+        # Bumped on every invalidation so in-flight misses don't store stale data
+        self._epoch = 0
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: list[Callable[[tuple], None]] = []
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._read("get", key)
+
+    async def smembers(self, key: str) -> frozenset:
+        return await self._read("smembers", key)
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(await self._read("hgetall", key))
+
+    async def sismember(self, key: str, member: str) -> bool:
+        return member in await self.smembers(key)
+
+    def add_listener(self, listener: Callable[[tuple], None]):
+        """Call listener(keys) on every invalidation, keys is empty when all are dropped"""
+        self._listeners.append(listener)
+
+    def invalidate(self, *keys: str):
+        """Drop cached keys, all of them when none are given"""
+        if keys:
+            keys = [key for key in keys if key in self.keys]
+            if not keys:
+                return
+        self._epoch += 1
+        self.invalidations += 1
+        if not keys:
+            self._cache.clear()
+        for key in keys:
+            for command in COMMANDS:
+                self._cache.pop((command, key))
+        for listener in self._listeners:
+            listener(tuple(keys))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "tracking": self.tracking,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "invalidations": self.invalidations,
+        }
+
+    async def _read(self, command: str, key: str) -> Any:
+        if key not in self.keys:
+            return await getattr(async_redis_client, command)(key)
+
+        value = self._cache.get((command, key), _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        epoch = self._epoch
+        value = await getattr(async_redis_client, command)(key)
+        if command == "smembers":
+            value = frozenset(value or ())
+        elif command == "hgetall":
+            value = dict(value or {})
+        if epoch == self._epoch:
+            ttl = self.tracking_ttl if self.tracking else self.ttl
+            self._cache.set((command, key), value, ttl=ttl)
+        return value
+
+    async def start(self):
+        """Start the invalidation listener on the running loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.tracking = False
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            connection = None
+            try:
+                pool = AsyncRedisClient.get_instance().connection_pool
+                connection = pool.make_connection()
+                await self._track(connection)
+                delay = 1
+                while True:
+                    message = await connection.read_response(push_request=True)
+                    self._on_invalidate(message)
+            except asyncio.CancelledError:
+                raise
+            except ResponseError as e:
+                # Server without CLIENT TRACKING, keep relying on the TTL
+                logging.warning(f"Redis client tracking unavailable: {e}")
+                delay = 60
+            except Exception as e:
+                handle_exception(e, "Redis tracking connection lost", source="redis_cache")
+            finally:
+                if self.tracking:
+                    self.tracking = False
+                    # Writes may have been missed while disconnected
+                    self.invalidate()
+                if connection:
+                    await connection.disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def _track(self, connection):
+        async def passthrough(response):
+            return response
+
+        await connection.connect()
+        # RESP3 delivers "invalidate" pushes which redis-py swallows otherwise
+        if hasattr(connection._parser, "set_invalidation_push_handler"):
+            connection._parser.set_invalidation_push_handler(passthrough)
+
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+
+        prefixes = [arg for key in sorted(self.keys) for arg in ("PREFIX", key)]
+        await connection.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+        )
+        await connection.read_response()
+
+        # RESP2 clients receive invalidations as messages on this channel
+        if int(connection.protocol or 2) < 3:
+            await connection.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+            await connection.read_response(push_request=True)
+
+        self.invalidate()
+        self.tracking = True
+        logging.info("Redis client tracking enabled")
+
+    def _on_invalidate(self, message):
+        # RESP2: ["message", channel, keys], RESP3: ["invalidate", keys]
+        if not message:
+            return
+        kind = message[0]
+        if kind == "invalidate":
+            keys = message[1]
+        elif kind == "message" and message[1] == INVALIDATE_CHANNEL:
+            keys = message[2]
+        else:
+            return
+        # A null key list means the whole keyspace was flushed
+        if keys is None:
+            self.invalidate()
+            return
+        keys = [key for key in keys if key in self.keys]
+        if keys:
+            self.invalidate(*keys)
+
+
+redis_cache = TrackedCache()
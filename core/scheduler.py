@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from core.exceptions import handle_exception
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable]
+    interval: float
+    jitter: float = 0.1
+    run_immediately: bool = True
+    runs: int = 0
+    failures: int = 0
+
+    def next_delay(self) -> float:
+        # Spread runs over +/- jitter so periodic traffic doesn't line up
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class AsyncScheduler:
+    """Run periodic coroutine jobs on the event loop"""
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def add_job(
+        self,
+        func: Callable[[], Awaitable],
+        interval: float,
+        jitter: float = 0.1,
+        name: Optional[str] = None,
+        run_immediately: bool = True,
+    ) -> Job:
+        """Register a job, it starts with the scheduler or right away if running"""
+        job = Job(name or func.__name__, func, interval, jitter, run_immediately)
+        self._jobs[job.name] = job
+        if self.running:
+            self._tasks[job.name] = asyncio.create_task(self._run(job))
+        return job
+
+    async def start(self):
+        """Start all jobs on the running loop"""
+        for name, job in self._jobs.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._run(job))
+        logging.info(f"Scheduler started with {len(self._jobs)} jobs")
+
+    async def shutdown(self):
+        """Cancel all jobs and wait for them to finish"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logging.info("Scheduler shutdown completed")
+
+    def stats(self) -> dict:
+        return {
+            name: {"interval": job.interval, "runs": job.runs, "failures": job.failures}
+            for name, job in self._jobs.items()
+        }
+
+    async def _run(self, job: Job):
+        if not job.run_immediately:
+            await asyncio.sleep(job.next_delay())
+        while True:
+            try:
+                await job.func()
+            except Exception as e:
+                job.failures += 1
+                handle_exception(e, f"Scheduled job {job.name} failed", source="scheduler")
+            job.runs += 1
+            await asyncio.sleep(job.next_delay())
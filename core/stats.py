@@ -0,0 +1,39 @@
+import threading
+from collections import deque
+from typing import Iterable, Optional
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LatencyWindow:
+    """Recent latency samples in milliseconds plus lifetime totals"""
+
+    def __init__(self, size: int = 1000):
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+            self.count += 1
+            self.total += latency
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = list(self._samples)
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 2) if self.count else None,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "max": max(samples, default=None),
+        }
@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+from telegram.request import HTTPXRequest
+
+from core.cache import LRUCache
+from core.config import (
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_QUEUE_SIZE,
+    TELEGRAM_SEND_WORKERS,
+)
+from core.exceptions import handle_exception
+from core.http import HttpClient
+
+API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+
+
+class SharedHTTPXRequest(HTTPXRequest):
+    """PTB request backend on the pooled client of the running loop"""
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return HttpClient.get_instance()
+
+    async def shutdown(self):
+        # The pool belongs to HttpClient and outlives the bot
+        pass
+
+
+class TokenBucket:
+    """Token bucket rate limiter for a single event loop"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """Take a token without waiting, return the seconds to wait when there is none"""
+        wait = self.wait_time()
+        if wait <= 0:
+            self._tokens -= 1
+        return wait
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def block(self, seconds: float):
+        """Hold all acquirers back, e.g. for a 429 retry_after"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+@dataclass
+class SendJob:
+    bot_token: str
+    chat_id: str
+    text: str
+    params: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    attempts: int = 0
+    result: Optional[dict] = None
+    # Put back into the queue by its chat's timer, ahead of the chat's waiting jobs
+    released: bool = False
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+        }
+
+
+class TelegramSender:
+    """
+    Async Bot API send queue with global and per-chat rate limits.
+
+    Workers never sleep on a chat's limit: a job whose chat has no token is
+    parked in that chat's FIFO and put back into the queue by a timer, so a
+    burst to one chat doesn't hold up the others.
+    """
+
+    def __init__(
+        self,
+        workers: int = TELEGRAM_SEND_WORKERS,
+        queue_size: int = TELEGRAM_QUEUE_SIZE,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        # Submitted jobs not finished yet, parked ones included
+        self._pending = 0
+        self._parked: dict[tuple, deque] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._global_buckets: dict[str, TokenBucket] = {}
+        self._chat_buckets = LRUCache(10000)
+        self._jobs = LRUCache(queue_size * 2)
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the worker tasks on the running loop"""
+        if self._tasks:
+            return
+        # Unbounded so parked jobs can always go back, submit() enforces queue_size
+        self._queue = asyncio.Queue()
+        self._pending = 0
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        logging.info(f"Telegram sender started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers, jobs still queued are cancelled"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        jobs = [job for parked in self._parked.values() for job in parked]
+        self._parked.clear()
+        while self._queue and not self._queue.empty():
+            jobs.append(self._queue.get_nowait())
+        for job in jobs:
+            job.status = "cancelled"
+            job.future.cancel()
+        self._pending = 0
+
+    def submit(self, bot_token: str, chat_id: str, text: str, **params) -> SendJob:
+        """Queue a message and return its job immediately"""
+        if not self._tasks:
+            raise RuntimeError("Telegram sender is not running")
+        if self._pending >= self.queue_size:
+            raise asyncio.QueueFull
+        job = SendJob(bot_token=bot_token, chat_id=str(chat_id), text=text, params=params)
+        self._queue.put_nowait(job)
+        self._pending += 1
+        # Fire-and-forget jobs never await the future, so consume failures here
+        job.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._jobs.set(job.id, job)
+        return job
+
+    async def send(self, bot_token: str, chat_id: str, text: str, **params) -> dict:
+        """Queue a message and wait for the Bot API response"""
+        job = self.submit(bot_token, chat_id, text, **params)
+        return await asyncio.shield(job.future)
+
+    def get_job(self, job_id: str) -> Optional[SendJob]:
+        return self._jobs.get(job_id)
+
+    def qsize(self) -> int:
+        return self._pending
+
+    def _global_bucket(self, bot_token: str) -> TokenBucket:
+        bucket = self._global_buckets.get(bot_token)
+        if bucket is None:
+            bucket = self._global_buckets[bot_token] = TokenBucket(TELEGRAM_GLOBAL_RATE)
+        return bucket
+
+    def _chat_bucket(self, bot_token: str, chat_id: str) -> TokenBucket:
+        key = (bot_token, chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(TELEGRAM_CHAT_RATE, capacity=1)
+            self._chat_buckets.set(key, bucket)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            done = False
+            try:
+                if not self._park(job):
+                    done = await self._deliver(job)
+            except Exception as e:
+                done = True
+                job.status = "failed"
+                job.result = {"ok": False, "description": str(e)}
+                if not job.future.done():
+                    job.future.set_exception(e)
+                handle_exception(e, "Failed to send telegram message", source="telegram")
+            finally:
+                if done:
+                    self._pending -= 1
+                self._queue.task_done()
+
+    def _park(self, job: SendJob) -> bool:
+        """Take the job's chat token, or park the job until the chat is ready"""
+        key = (job.bot_token, job.chat_id)
+        parked = self._parked.get(key)
+        if parked is not None and not job.released:
+            # Behind jobs already waiting, keeps each chat in order
+            job.status = "waiting"
+            parked.append(job)
+            return True
+
+        bucket = self._chat_bucket(*key)
+        wait = bucket.try_acquire()
+        if wait > 0:
+            job.status = "waiting"
+            self._parked.setdefault(key, deque()).appendleft(job)
+            self._schedule(key, wait)
+            return True
+
+        job.released = False
+        if parked is not None:
+            if parked:
+                self._schedule(key, bucket.wait_time())
+            else:
+                del self._parked[key]
+        return False
+
+    def _schedule(self, key: tuple, delay: float):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(delay, self._release, key)
+
+    def _release(self, key: tuple):
+        """Put the first parked job of a chat back into the queue"""
+        self._timers.pop(key, None)
+        parked = self._parked.get(key)
+        if not parked:
+            return
+        job = parked.popleft()
+        job.released = True
+        job.status = "queued"
+        self._queue.put_nowait(job)
+
+    async def _deliver(self, job: SendJob) -> bool:
+        """Send a job, return False when it was parked for a retry"""
+        client = HttpClient.get_instance()
+        url = API_URL.format(token=job.bot_token)
+        data = {"chat_id": job.chat_id, "text": job.text, **job.params}
+        global_bucket = self._global_bucket(job.bot_token)
+
+        job.status = "sending"
+        # Shared by every chat, so waiting here holds nobody back unfairly
+        await global_bucket.acquire()
+        job.attempts += 1
+        response = await client.post(url, data=data)
+        result = response.json()
+
+        if response.status_code == 429 and job.attempts <= self.max_retries:
+            retry_after = result.get("parameters", {}).get("retry_after", 1)
+            logging.warning(
+                f"Telegram rate limited chat {job.chat_id}, retry in {retry_after}s"
+            )
+            # A 429 can come from the bot-wide limit as well as the chat's
+            key = (job.bot_token, job.chat_id)
+            self._chat_bucket(*key).block(retry_after)
+            global_bucket.block(retry_after)
+            job.status = "waiting"
+            self._parked.setdefault(key, deque()).appendleft(job)
+            self._schedule(key, retry_after)
+            return False
+
+        job.status = "sent" if result.get("ok") else "failed"
+        job.result = result
+        if not job.future.done():
+            job.future.set_result(result)
+        return True
+
+
+telegram_sender = TelegramSender()
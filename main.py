@@ -2,7 +2,7 @@ import logging
 
 import uvicorn
 
-from core.config import WEB_PORT
+from core.config import BOT_SHARED_LOOP, WEB_PORT
 from web import app
 from bot import TelegramBot
 
@@ -13,15 +13,17 @@ def main():
     server = uvicorn.Server(config)
     bot = TelegramBot()
     try:
-        # Start initial bot thread
-        bot.thread_start()
+        # Start initial bot thread, in shared loop mode the web lifespan runs the bot
+        if not BOT_SHARED_LOOP:
+            bot.thread_start()
 
         # Run web service (main thread)
         server.run()
     except KeyboardInterrupt:
         logging.info("Server shutdown by keyboard interrupt")
     finally:
-        bot.thread_stop()
+        if not BOT_SHARED_LOOP:
+            bot.thread_stop()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,48 @@
+from datetime import datetime
 from typing import Optional
 
 from sqlmodel import SQLModel, Field
-from sqlalchemy import TEXT
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
+
+# Plain BLOB caps at 64 KB on MySQL
+Blob = LargeBinary().with_variant(LONGBLOB(), "mysql")
+
+
+class PageBlob(SQLModel, table=True):
+    """Page body stored once per distinct content, keyed by its sha256"""
+
+    __tablename__ = "page_blob"
+
+    hash: str = Field(primary_key=True, max_length=64)
+    # Precompressed variants, the identity body is decompressed from gzip
+    content_gzip: bytes = Field(sa_type=Blob)
+    content_br: bytes = Field(sa_type=Blob)
+    size: int = 0
 
 
 class Page(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
+    name: str = Field(index=True, unique=True)
+    url: Optional[str] = None
+    hash: Optional[str] = Field(default=None, max_length=64, foreign_key="page_blob.hash")
+    # Encoded length of content in bytes
+    size: Optional[int] = None
+    # Validators from the last full fetch of url, sent back on refresh
+    etag: Optional[str] = Field(default=None, max_length=255)
+    last_modified: Optional[str] = Field(default=None, max_length=64)
+    fetched_at: Optional[datetime] = None
+
+
+class PageSummary(SQLModel):
+    """Page listing row, loaded without content or variants"""
+
+    id: int
     name: str
     url: Optional[str] = None
-    content: str = Field(sa_type=TEXT, nullable=True)
+    size: Optional[int] = None
+    hash: Optional[str] = None
+
+
+# Columns selected for listings and the page index
+PAGE_SUMMARY_COLUMNS = (Page.id, Page.name, Page.url, Page.size, Page.hash)
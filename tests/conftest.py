@@ -0,0 +1,113 @@
+import asyncio
+import os
+import tempfile
+
+# Before core.config is imported: a SQLite stand-in for MySQL and fast chat limits
+os.environ.setdefault(
+    "ASYNC_DATABASE_URL",
+    f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db",
+)
+os.environ.setdefault("TELEGRAM_CHAT_RATE", "10")
+
+import httpx
+import pytest
+
+import bot.services.importer
+import bot.services.page
+from bot.services.page_cache import page_cache
+from bot.services.page_index import page_index
+from core.db import AsyncDatabase
+from core.http import HttpClient
+from model.page import Page
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh loop, disposing that loop's engine afterwards"""
+
+    def runner(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await HttpClient.close()
+                await AsyncDatabase.dispose()
+
+        return asyncio.run(main())
+
+    return runner
+
+
+@pytest.fixture
+def db(run):
+    """Empty page tables"""
+
+    async def reset():
+        async with AsyncDatabase.get_engine().begin() as connection:
+            await connection.run_sync(Page.metadata.drop_all)
+            await connection.run_sync(Page.metadata.create_all)
+
+    run(reset())
+    page_index.load([])
+    page_cache.evict()
+
+
+@pytest.fixture
+def page_urls(monkeypatch):
+    """URLs added to the Redis "page" set, instead of Redis"""
+    urls = []
+
+    class Client:
+        async def sadd(self, key, *members):
+            urls.extend(members)
+
+    monkeypatch.setattr(bot.services.page, "async_redis_client", Client())
+    monkeypatch.setattr(bot.services.importer, "async_redis_client", Client())
+    return urls
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Page names passed to page_cache.invalidate, instead of Redis"""
+    names = []
+
+    async def invalidate(*pages, data=None):
+        names.extend(pages)
+
+    monkeypatch.setattr(page_cache, "invalidate", invalidate)
+    return names
+
+
+class Upstream:
+    """Canned responses by URL for the outbound HTTP client"""
+
+    def __init__(self):
+        # url => (status, body, headers)
+        self.pages: dict[str, tuple] = {}
+        self.requests: list[httpx.Request] = []
+
+    def set(self, url: str, body="", status=200, content_type="text/html", **headers):
+        content = body if isinstance(body, bytes) else body.encode()
+        self.pages[url] = (status, content, {"Content-Type": content_type, **headers})
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, content, headers = self.pages.get(str(request.url), (404, b"", {}))
+        etag = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        headers = {key.replace("_", "-"): value for key, value in headers.items() if value}
+        return httpx.Response(status, content=content, headers=headers)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serve outbound requests from canned responses"""
+    server = Upstream()
+    transport = httpx.MockTransport(server.handler)
+    monkeypatch.setattr(
+        HttpClient,
+        "_create_client",
+        classmethod(lambda cls: httpx.AsyncClient(transport=transport)),
+    )
+    return server
@@ -0,0 +1,120 @@
+import codecs
+
+import httpx
+
+from bot.services.fetcher import SNIFF_BYTES, StreamDecoder, fetch_page, sniff_charset
+from bot.services.page_cache import content_hash
+from core.http import HttpClient
+
+URL = "http://upstream.test/a"
+
+
+def test_fetch_page(run, upstream):
+    upstream.set(URL, "<p>hello</p>", ETag='"v1"', Last_Modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    result = run(fetch_page(URL))
+    assert result.error is None
+    assert result.content == "<p>hello</p>"
+    assert result.hash == content_hash("<p>hello</p>")
+    assert result.size == len(b"<p>hello</p>")
+    assert result.charset == "utf-8"
+    assert (result.etag, result.last_modified) == ('"v1"', "Mon, 01 Jan 2024 00:00:00 GMT")
+
+
+def test_fetch_page_not_modified(run, upstream):
+    upstream.set(URL, "<p>hello</p>", ETag='"v1"')
+    result = run(fetch_page(URL, etag='"v1"', last_modified="yesterday"))
+    assert result.not_modified
+    assert result.content is None
+    assert (result.etag, result.last_modified) == ('"v1"', "yesterday")
+    assert upstream.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert upstream.requests[-1].headers["If-Modified-Since"] == "yesterday"
+
+
+def test_fetch_page_rejects_content_type(run, upstream):
+    upstream.set(URL, b"\x89PNG", content_type="image/png")
+    result = run(fetch_page(URL))
+    assert result.content is None
+    assert "image/png" in result.error
+
+
+def test_fetch_page_without_content_type(run, upstream):
+    upstream.set(URL, "plain", content_type=None)
+    assert run(fetch_page(URL)).content == "plain"
+
+
+def test_fetch_page_rejects_declared_length(run, upstream):
+    upstream.set(URL, "x" * 11)
+    result = run(fetch_page(URL, max_bytes=10))
+    assert result.content is None
+    assert "11 bytes" in result.error
+
+
+def test_fetch_page_rejects_streamed_body(run, monkeypatch):
+    async def body():
+        for _ in range(4):
+            yield b"x" * 4
+
+    def handler(request):
+        # No Content-Length, so only the running count can catch it
+        return httpx.Response(200, content=body(), headers={"Content-Type": "text/html"})
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        HttpClient,
+        "_create_client",
+        classmethod(lambda cls: httpx.AsyncClient(transport=transport)),
+    )
+    result = run(fetch_page(URL, max_bytes=10))
+    assert result.content is None
+    assert result.error == "Body exceeds 10 bytes"
+
+
+def test_fetch_page_error_status(run, upstream):
+    result = run(fetch_page(URL))
+    assert result.content is None
+    assert "404" in result.error
+
+
+def test_fetch_page_header_charset(run, upstream):
+    upstream.set(URL, "café".encode("latin-1"), content_type="text/html; charset=iso-8859-1")
+    result = run(fetch_page(URL))
+    assert result.content == "café"
+    assert result.charset == "iso8859-1"
+    assert result.hash == content_hash("café")
+
+
+def test_fetch_page_meta_charset(run, upstream):
+    body = '<meta charset="windows-1251"><p>привет</p>'.encode("cp1251")
+    upstream.set(URL, body)
+    result = run(fetch_page(URL))
+    assert result.content == '<meta charset="windows-1251"><p>привет</p>'
+    assert result.charset == "cp1251"
+
+
+def test_sniff_charset():
+    assert sniff_charset(b"<p>") == "utf-8"
+    assert sniff_charset(b"<p>", "latin-1") == "iso8859-1"
+    assert sniff_charset(b"<p>", "bogus") == "utf-8"
+    assert sniff_charset(b"<meta charset='bogus'>", "koi8-r") == "koi8-r"
+    assert sniff_charset(b'<meta http-equiv="Content-Type" content="text/html; charset=koi8-r">') == "koi8-r"
+    # A BOM wins over both the header and the meta tag
+    assert sniff_charset(codecs.BOM_UTF8 + b"<meta charset=koi8-r>", "latin-1") == "utf-8-sig"
+    assert sniff_charset(codecs.BOM_UTF16_LE) == "utf-16"
+
+
+def test_stream_decoder_bom():
+    decoder = StreamDecoder("latin-1")
+    decoder.feed(codecs.BOM_UTF8 + "é".encode())
+    assert decoder.finish() == "é"
+    assert decoder.charset == "utf-8-sig"
+
+
+def test_stream_decoder_split_chunks():
+    text = "ж" * SNIFF_BYTES
+    data = text.encode()
+    decoder = StreamDecoder()
+    # Odd chunk sizes split multi-byte characters across chunks
+    for i in range(0, len(data), 7):
+        decoder.feed(data[i : i + 7])
+    assert decoder.finish() == text
+    assert decoder.hash == content_hash(text)
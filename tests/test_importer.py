@@ -0,0 +1,81 @@
+import pytest
+from sqlmodel import select
+
+from bot.services.importer import ImportReport, import_pages, parse_import
+from bot.services.page import find_page, set_page, upsert_pages
+from core.db import async_session
+from model.page import Page
+
+
+def test_parse_import():
+    items = parse_import(
+        "# comment\n"
+        "a-https://example.com/a\n"
+        "\n"
+        "b-<p>b</p>\n"
+        "missing source-\n"
+        "a-<p>again</p>\n"
+    )
+
+    assert [(item.name, item.status) for item in items] == [
+        ("a", "failed"),
+        ("b", "pending"),
+        ("missing source", "failed"),
+        ("a", "pending"),
+    ]
+    assert items[0].error == "Replaced by a later line"
+    assert items[0].url == "https://example.com/a"
+    assert items[3].url is None
+
+
+def test_report_format_lists_failures():
+    items = parse_import("a-x\nbad line")
+    items[0].status = "created"
+
+    assert ImportReport(items).format() == (
+        "Imported 2 pages (created: 1, failed: 1)\n"
+        "bad line: Line must be in format 'name-url'"
+    )
+
+
+def test_import_pages(run, db, published):
+    report = run(import_pages("a-one\nb-two\nc-one"))
+    assert report.counts() == {"created": 3}
+    assert sorted(published) == ["a", "b", "c"]
+
+    report = run(import_pages("a-one\nb-changed"))
+    assert report.counts() == {"unchanged": 1, "updated": 1}
+
+
+def test_import_rejects_too_many_items(run, db):
+    with pytest.raises(ValueError, match="at most 2"):
+        run(import_pages("a-1\nb-2\nc-3", max_items=2))
+
+
+def test_import_of_literal_content_detaches_the_url(run, db, published, page_urls, upstream):
+    upstream.set("http://upstream.test/a", "<p>same</p>", ETag='"v1"')
+    assert run(import_pages("a-http://upstream.test/a")).counts() == {"created": 1}
+    assert page_urls == ["http://upstream.test/a"]
+
+    # Same body, but the page no longer follows the URL
+    assert run(import_pages("a-<p>same</p>")).counts() == {"updated": 1}
+
+    async def source():
+        async with async_session() as session:
+            page = await find_page(session, "a")
+            return page.url, page.etag, page.fetched_at
+
+    assert run(source()) == (None, None, None)
+
+
+def test_upsert_overwrites_a_page_created_concurrently(run, db, published):
+    run(set_page("a-first"))
+
+    async def upsert():
+        async with async_session() as session:
+            await upsert_pages(session, [Page(name="a", hash=None, size=5), Page(name="b", size=1)])
+            await session.commit()
+        async with async_session() as session:
+            return [(page.name, page.size) for page in (await session.exec(select(Page).order_by(Page.id))).all()]
+
+    assert run(upsert()) == [("a", 5), ("b", 1)]
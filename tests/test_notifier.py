@@ -0,0 +1,46 @@
+from core.notifier import AdminNotifier
+
+
+def test_repeated_errors_are_sent_once():
+    notifier = AdminNotifier(interval=60)
+    sent = []
+    notifier.send = lambda text, chat_id=None: sent.append(text)
+
+    for _ in range(1000):
+        notifier.notify_error("KeyError|a.py:1", "KeyError in a.py:1", "details")
+    notifier.notify_error("ValueError|b.py:2", "ValueError in b.py:2", "details")
+
+    assert sent == ["details", "details"]
+    assert notifier.stats()["suppressed"] == 999
+
+
+def test_digest_counts_repeats_and_forgets_quiet_errors():
+    notifier = AdminNotifier(interval=60)
+    notifier.send = lambda text, chat_id=None: None
+    for _ in range(3):
+        notifier.notify_error("a", "Error a", "details")
+    notifier.notify_error("b", "Error b", "details")
+
+    assert notifier.digest() == "Repeated errors in the last 60s:\n2x Error a"
+    # Nothing repeated since, and b never repeated at all
+    assert notifier.digest() is None
+    assert notifier.stats()["fingerprints"] == 0
+
+
+def test_distinct_errors_beyond_the_limit_are_folded():
+    notifier = AdminNotifier(max_fingerprints=2)
+    sent = []
+    notifier.send = lambda text, chat_id=None: sent.append(text)
+    for i in range(5):
+        notifier.notify_error(f"error {i}", f"Error {i}", f"details {i}")
+
+    # The first overflow is sent as "other", later ones only counted
+    assert sent == ["details 0", "details 1", "details 2"]
+    assert "2x Other errors" in notifier.digest()
+
+
+def test_send_without_a_running_loop_is_dropped():
+    notifier = AdminNotifier()
+    notifier.send("hello")
+
+    assert notifier.stats()["dropped"] == 1
@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+from sqlmodel import select
+
+from bot.services.page import get_pages, load_page, load_page_index, set_page
+from bot.services.page_index import page_index
+from core.db import async_session
+from model.page import Page, PageBlob
+
+
+async def blob_hashes():
+    async with async_session() as session:
+        return set((await session.exec(select(PageBlob.hash))).all())
+
+
+async def page_body(name):
+    async with async_session() as session:
+        return gzip.decompress((await load_page(session, name)).content_gzip).decode()
+
+
+def test_set_page_stores_and_lists(run, db, published):
+    run(set_page("home-<p>hello</p>"))
+    run(set_page("about-<p>about</p>"))
+
+    assert run(get_pages()) == "pages: home;about"
+    assert run(page_body("home")) == "<p>hello</p>"
+    assert published == ["home", "about"]
+    assert page_index.get("about").size == len("<p>about</p>")
+
+
+def test_load_page_index(run, db, published):
+    for i in range(5):
+        run(set_page(f"p{i}-body {i}"))
+    page_index.load([])
+
+    assert run(load_page_index()) == 5
+    assert page_index.get("p3") is not None
+    assert page_index.choice().name in {f"p{i}" for i in range(5)}
+
+
+def test_identical_content_shares_a_blob(run, db, published):
+    run(set_page("a-same"))
+    run(set_page("b-same"))
+
+    assert len(run(blob_hashes())) == 1
+
+
+def test_replaced_blob_is_released_once_unreferenced(run, db, published):
+    run(set_page("a-same"))
+    run(set_page("b-same"))
+    run(set_page("a-other"))
+    assert len(run(blob_hashes())) == 2
+
+    run(set_page("b-other"))
+    assert len(run(blob_hashes())) == 1
+    assert run(page_body("b")) == "other"
+
+
+def test_unchanged_page_is_not_published(run, db, published):
+    run(set_page("a-same"))
+    run(set_page("a-same"))
+
+    assert published == ["a"]
+
+
+def test_set_page_rejects_bad_format(run, db, published):
+    with pytest.raises(ValueError):
+        run(set_page("no separator"))
+
+    async def count():
+        async with async_session() as session:
+            return len((await session.exec(select(Page))).all())
+
+    assert run(count()) == 0
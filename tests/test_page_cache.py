@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+
+import bot.services.page_cache
+from bot.services.page_cache import PageCache, compress_content
+from core.cache import LRUCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        for name, args, kwargs in self.commands:
+            await getattr(self.redis, name)(*args, **kwargs)
+
+
+class FakeRedis:
+    """The subset of redis.asyncio used by PageCache, bytes in and out"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    def get_instance(self, decode_responses=True):
+        return self
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return str(value).encode() if value is not None else None
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+
+    async def hgetall(self, key):
+        return {name.encode(): value for name, value in self.data.get(key, {}).items()}
+
+    async def hset(self, key, mapping):
+        self.data[key] = {
+            name: value.encode() if isinstance(value, str) else value
+            for name, value in mapping.items()
+        }
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def publish(self, channel, message):
+        self.published.append(message)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(bot.services.page_cache, "AsyncRedisClient", fake)
+    return fake
+
+
+class Loader:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+        self.gate = None
+
+    async def __call__(self):
+        self.calls += 1
+        blob = compress_content(self.content)
+        if self.gate:
+            await self.gate.wait()
+        return blob
+
+
+def test_reads_go_through_l1_then_l2(redis):
+    cache = PageCache()
+    loader = Loader("<p>hello</p>")
+
+    async def main():
+        first = await cache.get("home", loader)
+        await cache.get("home", loader)
+        # Another process: empty L1, same Redis
+        cache.evict()
+        third = await cache.get("home", loader)
+        return first, third
+
+    first, third = asyncio.run(main())
+    assert first.content == third.content == b"<p>hello</p>"
+    assert loader.calls == 1
+    assert cache.stats()["l1_hits"] == 1 and cache.stats()["l2_hits"] == 1
+
+
+def test_invalidate_moves_the_page_to_a_new_generation(redis):
+    cache = PageCache()
+    loader = Loader("old")
+
+    async def main():
+        await cache.get("home", loader)
+        loader.content = "new"
+        await cache.invalidate("home", data={"home": {"id": 1}})
+        return await cache.get("home", loader)
+
+    assert asyncio.run(main()).content == b"new"
+    assert loader.calls == 2
+    assert redis.published == ['{"name": "home", "data": {"id": 1}}']
+
+
+def test_fill_racing_with_a_write_is_not_served_again(redis):
+    cache = PageCache()
+    loader = Loader("old")
+
+    async def main():
+        loader.gate = asyncio.Event()
+        read = asyncio.create_task(cache.get("home", loader))
+        await asyncio.sleep(0)
+        # The write commits and invalidates while the old body is being loaded
+        await cache.invalidate("home")
+        loader.gate.set()
+        stale = await read
+        loader.gate = None
+        loader.content = "new"
+        return stale, await cache.get("home", loader)
+
+    stale, fresh = asyncio.run(main())
+    assert stale.content == b"old"
+    # Neither L1 (epoch) nor L2 (old generation) kept the stale page
+    assert fresh.content == b"new"
+    assert loader.calls == 2
+
+
+def test_redis_errors_fall_back_to_the_loader(monkeypatch):
+    class Broken:
+        def get_instance(self, decode_responses=True):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(bot.services.page_cache, "AsyncRedisClient", Broken())
+    cache = PageCache()
+    loader = Loader("body")
+
+    assert asyncio.run(cache.get("home", loader)).content == b"body"
+    assert cache.stats()["errors"] == 1
+
+
+def test_l1_is_bounded_by_bytes(redis):
+    cache = PageCache(maxbytes=2500)
+
+    async def main():
+        for name in ("a", "b", "c"):
+            await cache.get(name, Loader("x" * 1000))
+
+    asyncio.run(main())
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["bytes"] <= 2500
+
+
+def test_lru_cache_weigher():
+    cache = LRUCache(10, weigher=len)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.set("a", "aa")
+    cache.set("c", "cccc")
+    assert cache.weight == 10 and cache.get("b") == "bbbb"
+
+    cache.set("d", "dddd")
+    assert cache.get("a") is None and cache.weight == 8
+    # Heavier than the whole cache, not kept and nothing evicted for it
+    cache.set("e", "e" * 11)
+    assert cache.get("e") is None and len(cache) == 2
@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from bot.services.page_index import AliasTable, PageEntry, PageIndex
+
+
+def test_alias_table_follows_weights():
+    weights = [1, 2, 3, 4]
+    table = AliasTable(weights)
+    rng = random.Random(42)
+    counts = Counter(table.sample(rng) for _ in range(100_000))
+
+    for i, weight in enumerate(weights):
+        assert counts[i] / 100_000 == pytest.approx(weight / sum(weights), abs=0.01)
+
+
+def test_alias_table_never_picks_zero_weight():
+    table = AliasTable([0, 1, 0, 1])
+    rng = random.Random(1)
+
+    assert {table.sample(rng) for _ in range(1000)} == {1, 3}
+
+
+def test_page_index_upsert_and_remove():
+    index = PageIndex()
+    index.load([PageEntry(1, "a"), PageEntry(2, "b")])
+    index.upsert(PageEntry(2, "b", hash="h"))
+    index.upsert(PageEntry(3, "c"))
+    index.remove("a")
+
+    assert len(index) == 2
+    assert index.get("b").hash == "h"
+    assert {index.choice().name for _ in range(100)} == {"b", "c"}
+
+
+def test_page_index_skips_zero_weight_pages():
+    index = PageIndex()
+    index.load([PageEntry(1, "a", weight=0), PageEntry(2, "b", weight=2)])
+
+    assert {index.choice().name for _ in range(100)} == {"b"}
+    assert PageIndex().choice() is None
+
+
+def test_uniform_upserts_update_in_place(monkeypatch):
+    index = PageIndex()
+    index.load([PageEntry(1, "a"), PageEntry(2, "b")])
+    entries, _ = index._snapshot
+    rebuilds = []
+    monkeypatch.setattr(index, "_rebuild", lambda: rebuilds.append(1))
+
+    index.upsert(PageEntry(1, "a", hash="new"))
+    index.upsert(PageEntry(3, "c"))
+
+    assert rebuilds == []
+    assert index._snapshot[0] is entries
+    assert [entry.name for entry in entries] == ["a", "b", "c"]
+    assert entries[0].hash == "new"
+
+
+def test_weight_changes_rebuild_the_alias_table():
+    index = PageIndex()
+    index.load([PageEntry(1, "a"), PageEntry(2, "b")])
+    index.upsert(PageEntry(2, "b", weight=3))
+
+    entries, table = index._snapshot
+    assert table is not None
+    # Same weight again is replaced in place, the table still applies
+    index.upsert(PageEntry(2, "b", hash="h", weight=3))
+    assert index._snapshot[1] is table
+    assert index.get("b").hash == "h"
+
+    index.upsert(PageEntry(1, "a", weight=0))
+    assert {index.choice().name for _ in range(100)} == {"b"}
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from datetime import datetime
+
+from telegram import Chat, Message, Update
+
+from bot.utils.processor import ChatOrderedUpdateProcessor
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    return Update(update_id, message=Message(update_id, datetime.now(), Chat(chat_id, "private")))
+
+
+def test_chats_stay_ordered_without_blocking_each_other():
+    async def main():
+        processor = ChatOrderedUpdateProcessor(2, handler_timeout=None)
+        start = time.monotonic()
+        started = {}
+
+        async def handler(name: str, seconds: float):
+            started[name] = time.monotonic() - start
+            await asyncio.sleep(seconds)
+
+        # Chat 1 queues slow updates, they must not take chat 2's slot while waiting
+        tasks = [
+            asyncio.create_task(processor.process_update(make_update(i, 1), handler(f"a{i}", 0.2)))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        tasks.append(
+            asyncio.create_task(processor.process_update(make_update(9, 2), handler("b", 0)))
+        )
+        await asyncio.gather(*tasks)
+        return started, processor.stats()
+
+    started, stats = asyncio.run(main())
+
+    assert started["b"] < 0.1
+    assert started["a0"] < started["a1"] < started["a2"]
+    assert started["a2"] >= 0.4
+    assert stats["chats"] == 0 and stats["in_flight"] == 0
+
+
+def test_handler_timeout_is_counted():
+    async def main():
+        processor = ChatOrderedUpdateProcessor(1, handler_timeout=0.05)
+        await processor.process_update(make_update(1, 1), asyncio.sleep(1))
+        return processor.stats()
+
+    assert asyncio.run(main())["timeouts"] == 1
+
+
+def test_updates_waiting_for_their_turn_are_counted():
+    async def main():
+        processor = ChatOrderedUpdateProcessor(1, handler_timeout=None)
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(processor.process_update(make_update(i, i % 2), release.wait()))
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.01)
+        during = processor.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+        return during, processor.stats()
+
+    during, after = asyncio.run(main())
+
+    assert (during["in_flight"], during["waiting"]) == (1, 3)
+    assert (after["in_flight"], after["waiting"]) == (0, 0)
+
+
+def test_cancelled_waiting_update_is_uncounted():
+    async def main():
+        processor = ChatOrderedUpdateProcessor(1, handler_timeout=None)
+        release = asyncio.Event()
+        running = asyncio.create_task(processor.process_update(make_update(1, 1), release.wait()))
+        never_run = asyncio.sleep(0)
+        waiting = asyncio.create_task(processor.process_update(make_update(2, 1), never_run))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        never_run.close()
+        release.set()
+        await running
+        return processor.stats()
+
+    stats = asyncio.run(main())
+    assert stats["waiting"] == 0 and stats["chats"] == 0
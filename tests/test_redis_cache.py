@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import core.redis_cache
+from core.redis_cache import INVALIDATE_CHANNEL, TrackedCache
+
+
+class FakeRedis:
+    """Stands in for the async client, counting reads and optionally pausing them"""
+
+    def __init__(self):
+        self.data = {"admin": "1", "user": {"10", "11"}, "node": {"a": "x"}, "other": "o"}
+        self.reads = 0
+        self.gate = None
+
+    async def _read(self, key):
+        self.reads += 1
+        value = self.data.get(key)
+        if self.gate:
+            await self.gate.wait()
+        return value
+
+    get = smembers = hgetall = _read
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(core.redis_cache, "async_redis_client", fake)
+    return fake
+
+
+def test_cached_keys_are_read_once(redis):
+    cache = TrackedCache()
+
+    async def main():
+        for _ in range(3):
+            assert await cache.get("admin") == "1"
+            assert await cache.sismember("user", "11")
+            assert await cache.hgetall("node") == {"a": "x"}
+
+    asyncio.run(main())
+    assert redis.reads == 3
+    assert cache.stats()["hits"] == 6
+
+
+def test_uncached_keys_always_hit_redis(redis):
+    cache = TrackedCache()
+
+    async def main():
+        await cache.get("other")
+        await cache.get("other")
+
+    asyncio.run(main())
+    assert redis.reads == 2
+
+
+def test_invalidate_drops_keys_and_notifies(redis):
+    cache = TrackedCache()
+    seen = []
+    cache.add_listener(seen.append)
+
+    async def main():
+        await cache.get("admin")
+        redis.data["admin"] = "2"
+        cache.invalidate("admin", "other")
+        return await cache.get("admin")
+
+    assert asyncio.run(main()) == "2"
+    # Keys that aren't cached are filtered out before listeners run
+    assert seen == [("admin",)]
+    cache.invalidate("other")
+    assert seen == [("admin",)]
+
+
+def test_invalidation_during_a_miss_is_not_cached(redis):
+    cache = TrackedCache()
+
+    async def main():
+        redis.gate = asyncio.Event()
+        read = asyncio.create_task(cache.get("admin"))
+        await asyncio.sleep(0)
+        # A write lands while the old value is in flight
+        redis.data["admin"] = "2"
+        cache.invalidate("admin")
+        redis.gate.set()
+        assert await read == "1"
+        return await cache.get("admin")
+
+    assert asyncio.run(main()) == "2"
+    assert redis.reads == 2
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        (["invalidate", ["admin", "other"]], [("admin",)]),
+        (["message", INVALIDATE_CHANNEL, ["user"]], [("user",)]),
+        (["invalidate", None], [()]),
+        (["message", "elsewhere", ["admin"]], []),
+        (["invalidate", ["other"]], []),
+        ([], []),
+    ],
+)
+def test_tracking_messages(message, expected):
+    cache = TrackedCache()
+    seen = []
+    cache.add_listener(seen.append)
+    cache._on_invalidate(message)
+
+    assert seen == expected
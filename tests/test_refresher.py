@@ -0,0 +1,94 @@
+import gzip
+
+from bot.services.page import find_page, load_page, set_page
+from bot.services.refresher import PageRefresher
+from core.db import async_session
+
+URL = "http://upstream.test/a"
+
+
+async def get_page(name):
+    async with async_session() as session:
+        return await find_page(session, name)
+
+
+async def page_content(name):
+    async with async_session() as session:
+        return gzip.decompress((await load_page(session, name)).content_gzip)
+
+
+def refresh(run):
+    refresher = PageRefresher(host_delay=0)
+    run(refresher.run())
+    return dict(refresher.counts)
+
+
+def test_not_modified(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>one</p>", ETag='"v1"')
+    run(set_page(f"a-{URL}"))
+
+    assert refresh(run) == {"not_modified": 1}
+    assert upstream.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert published == ["a"]
+
+
+def test_same_body_without_validators_is_unchanged(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>one</p>")
+    run(set_page(f"a-{URL}"))
+
+    assert refresh(run) == {"unchanged": 1}
+    assert published == ["a"]
+
+
+def test_new_validators_are_stored_without_publishing(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>one</p>", Last_Modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    run(set_page(f"a-{URL}"))
+    upstream.set(URL, "<p>one</p>", Last_Modified="Tue, 02 Jan 2024 00:00:00 GMT")
+
+    assert refresh(run) == {"unchanged": 1}
+    assert run(get_page("a")).last_modified == "Tue, 02 Jan 2024 00:00:00 GMT"
+    assert published == ["a"]
+
+
+def test_changed_body_is_stored_and_published(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>one</p>", ETag='"v1"')
+    run(set_page(f"a-{URL}"))
+    upstream.set(URL, "<p>two</p>", ETag='"v2"')
+
+    assert refresh(run) == {"updated": 1}
+    assert run(page_content("a")) == b"<p>two</p>"
+    assert run(get_page("a")).etag == '"v2"'
+    assert published == ["a", "a"]
+
+
+def test_failed_fetch_keeps_the_page(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>one</p>")
+    run(set_page(f"a-{URL}"))
+    upstream.set(URL, "gone", status=500)
+
+    assert refresh(run) == {"failed": 1}
+    assert run(page_content("a")) == b"<p>one</p>"
+
+
+def test_literal_content_detaches_the_url(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>remote</p>", ETag='"v1"')
+    run(set_page(f"a-{URL}"))
+    run(set_page("a-<p>literal</p>"))
+
+    page = run(get_page("a"))
+    assert (page.url, page.etag, page.last_modified, page.fetched_at) == (None, None, None, None)
+
+    upstream.set(URL, "<p>remote changed</p>", ETag='"v2"')
+    requests = len(upstream.requests)
+    assert refresh(run) == {}
+    assert len(upstream.requests) == requests
+    assert run(page_content("a")) == b"<p>literal</p>"
+
+
+def test_literal_write_of_the_fetched_body_is_not_skipped(run, db, published, page_urls, upstream):
+    upstream.set(URL, "<p>same</p>", ETag='"v1"')
+    run(set_page(f"a-{URL}"))
+    run(set_page("a-<p>same</p>"))
+
+    assert run(get_page("a")).url is None
+    assert published == ["a", "a"]
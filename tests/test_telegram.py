@@ -0,0 +1,82 @@
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+import httpx
+
+from core.http import HttpClient
+from core.telegram import TelegramSender, TokenBucket
+
+
+def test_token_bucket_try_acquire():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert 0 < bucket.try_acquire() <= 0.1
+
+
+def test_token_bucket_block():
+    bucket = TokenBucket(rate=100)
+    bucket.block(0.5)
+
+    assert 0.4 < bucket.try_acquire() <= 0.5
+
+
+def test_token_bucket_acquire_waits_for_refill():
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert 0.09 < asyncio.run(main()) < 0.3
+
+
+def run_sender(messages, responses=None):
+    """Send (chat_id, text) pairs through a sender on a mocked Bot API"""
+    sent = []
+    responses = list(responses or [])
+
+    def handler(request: httpx.Request):
+        data = {key: value[0] for key, value in parse_qs(request.content.decode()).items()}
+        if responses:
+            return responses.pop(0)
+        sent.append((data["chat_id"], data["text"]))
+        return httpx.Response(200, json={"ok": True})
+
+    async def main():
+        HttpClient._clients[asyncio.get_running_loop()] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        sender = TelegramSender(workers=2, queue_size=10)
+        await sender.start()
+        try:
+            await asyncio.gather(
+                *(sender.send("token", chat_id, text) for chat_id, text in messages)
+            )
+            return sender.qsize()
+        finally:
+            await sender.stop()
+            await HttpClient.close()
+
+    pending = asyncio.run(main())
+    return sent, pending
+
+
+def test_busy_chat_does_not_hold_up_other_chats():
+    messages = [("a", f"a{i}") for i in range(4)] + [("b", "b0")]
+    sent, pending = run_sender(messages)
+
+    # b goes out with a's first message instead of after a's burst
+    assert sent.index(("b", "b0")) <= 1
+    assert [text for chat_id, text in sent if chat_id == "a"] == ["a0", "a1", "a2", "a3"]
+    assert pending == 0
+
+
+def test_rate_limited_message_is_retried_in_order():
+    limited = httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 0.2}})
+    sent, _ = run_sender([("a", "a0"), ("a", "a1")], responses=[limited])
+
+    assert sent == [("a", "a0"), ("a", "a1")]
@@ -1,78 +1,125 @@
 import asyncio
 from contextlib import asynccontextmanager
+import hmac
+import json
 import logging
-import random
 from threading import Lock
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from fastapi import FastAPI, Depends, Response, HTTPException
-from fastapi.responses import JSONResponse
-import httpx
-from sqlmodel import Session, select
+from fastapi import FastAPI, Depends, Header, Query, Request, Response, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from bot import TelegramBot
-from core.config import INTERVAL_TIME, WEB_PORT
-from core.db import get_session
+from bot.services.importer import import_pages
+from bot.services.monitor import health_monitor
+from bot.services.page import get_cached_page, list_pages, load_page_index
+from bot.services.page_cache import CachedPage, etag_matches, page_cache
+from bot.services.page_index import page_index
+from bot.services.reader import get_config_snapshot
+from bot.services.refresher import page_refresher
+from bot.services.probe import probe_many
+from core.config import (
+    BOT_SHARED_LOOP,
+    MONITOR_INTERVAL,
+    MONITOR_JITTER,
+    PAGE_IMPORT_MAX_BYTES,
+    PAGE_LIST_LIMIT,
+    PAGE_LIST_MAX_LIMIT,
+    PAGE_REFRESH_INTERVAL,
+    PROBE_CONCURRENCY,
+    PROBE_TIMEOUT,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+)
+from core.db import AsyncDatabase, get_async_session, get_pool_stats
 from core.exceptions import handle_exception
-from core.redis import redis_client
-from core.utils import send_message
-from model.page import Page
+from core.http import HttpClient
+from core.metrics import MetricsMiddleware, registry
+from core.notifier import admin_notifier
+from core.telegram import telegram_sender
+from core.redis import AsyncRedisClient, async_redis_client
+from core.redis_cache import redis_cache
+from core.scheduler import AsyncScheduler
 
-stop_web_event = asyncio.Event()
 restart_lock = Lock()
 
 cache_page = "Hello, World!"
 
 
 # Initialize scheduler
-scheduler = BackgroundScheduler()
+scheduler = AsyncScheduler()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Start scheduler and add scheduled tasks
-    scheduler.add_job(keep_web_alive, "interval", seconds=INTERVAL_TIME)
-
-    scheduler.start()
-
-    yield  # Application runs here until shutdown
-
-    # Cleanup on application shutdown
-    scheduler.shutdown()
-
-
-def keep_web_alive():
-    """Keep web service alive by periodic health checks"""
-    # Check stop event
-    if stop_web_event.is_set():
-        return
+    # Open the outbound pool up front, it is closed again on shutdown
+    HttpClient.get_instance()
 
+    # Build the page index once so random pages are served from memory
     try:
-        httpx.get(f"http://127.0.0.1:{WEB_PORT}/")
+        count = await load_page_index()
+        logging.info(f"Page index loaded with {count} pages")
     except Exception as e:
-        handle_exception(e, "Error: {e}", source="keep_web_alive")
+        handle_exception(e, "Failed to load page index", source="web")
+
+    # Start scheduler and add scheduled tasks. Probing the alive URLs for
+    # the health monitor is also what keeps them warm.
+    scheduler.add_job(
+        health_monitor.check,
+        MONITOR_INTERVAL,
+        jitter=MONITOR_JITTER,
+        name="keep_alive",
+    )
+    if PAGE_REFRESH_INTERVAL > 0:
+        scheduler.add_job(
+            page_refresher.run,
+            PAGE_REFRESH_INTERVAL,
+            name="page_refresh",
+            run_immediately=False,
+        )
 
+    await scheduler.start()
+    await telegram_sender.start()
+    await admin_notifier.start()
+    await redis_cache.start()
+    await page_cache.start()
+    if BOT_SHARED_LOOP:
+        # The bot shares this loop and its HTTP and Redis pools
+        await TelegramBot().start()
 
-# Add a new function to handle shutdown
-def shutdown_scheduler():
-    if scheduler.running:
-        try:
-            scheduler.shutdown(wait=False)
-            logging.info("Scheduler shutdown completed")
-        except Exception as e:
-            handle_exception(e, "Error shutting down scheduler", source="scheduler")
+    yield  # Application runs here until shutdown
+
+    # Cleanup on application shutdown
+    if BOT_SHARED_LOOP:
+        await TelegramBot().stop()
+    await scheduler.shutdown()
+    await admin_notifier.stop()
+    await telegram_sender.stop()
+    await page_cache.stop()
+    await redis_cache.stop()
+    await HttpClient.close()
+    await AsyncRedisClient.close()
+    await AsyncDatabase.dispose()
 
 
 app = FastAPI(lifespan=lifespan, openapi_url=None)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
-async def index(name: str | None = None, session: Session = Depends(get_session)):
+async def index(
+    name: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_async_session),
+):
     """Get page content by name or return a random page"""
     try:
         if name:
-            return await get_page_by_name(name, session)
-        return await get_random_page(session)
+            return await get_page_by_name(
+                name, session, if_none_match, accept_encoding
+            )
+        return await get_random_page(session, accept_encoding)
     except Exception as e:
         handle_exception(e, "Failed to get page content", source="web")
         return Response(
@@ -80,80 +127,129 @@ async def index(name: str | None = None, session: Session = Depends(get_session)
         )
 
 
-async def get_page_by_name(name: str, session: Session) -> Response:
+def page_response(
+    page: CachedPage,
+    accept_encoding: str | None = None,
+    if_none_match: str | None = None,
+    etag: bool = False,
+) -> Response:
+    """Send the precompressed variant of a page matching Accept-Encoding"""
+    content, encoding = page.encode(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if etag:
+        headers["ETag"] = page.etag_for(encoding)
+        headers["Cache-Control"] = "no-cache"
+        if etag_matches(if_none_match, page):
+            return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="text/html", headers=headers)
+
+
+async def get_page_by_name(
+    name: str,
+    session: AsyncSession,
+    if_none_match: str | None = None,
+    accept_encoding: str | None = None,
+) -> Response:
     """Get page content by name"""
-    page = session.exec(select(Page).where(Page.name == name)).first()
-    if not page:
+    page = await get_cached_page(session, name)
+    if page is None:
         return Response(
             content="Page not found", media_type="text/html", status_code=404
         )
 
-    cache_page = page.content
-    return Response(content=cache_page, media_type="text/html")
-
+    return page_response(page, accept_encoding, if_none_match, etag=True)
 
-async def get_random_page(session: Session) -> Response:
-    """Get a random page from database or Redis"""
 
-    # Get pages from database
-    db_pages = [i.content for i in session.exec(select(Page)).all()]
-
-    # Get pages from Redis
-    # redis_pages = redis_client.smembers("page")
-    redis_pages = []
-
-    # Combine pages
-    all_pages = db_pages + list(redis_pages)
-    if not all_pages:
+async def get_random_page(
+    session: AsyncSession, accept_encoding: str | None = None
+) -> Response:
+    """Get a random page picked from the in-process page index"""
+    entry = page_index.choice()
+    page = await get_cached_page(session, entry.name) if entry else None
+    if page is None:
         return Response(
             content="No pages available", media_type="text/html", status_code=404
         )
 
-    # Select random page
-    page = random.choice(all_pages)
+    return page_response(page, accept_encoding)
+
+
+@app.get("/telegram")
+async def telegram(bot_token: str, chat_id: str, message: str, wait: bool = True):
+    """Send a message through the rate-limited send queue"""
+    params = {"disable_web_page_preview": "true"}
     try:
-        index_page = page.content if hasattr(page, "content") else page
-    except AttributeError:
-        index_page = page
+        if not wait:
+            job = telegram_sender.submit(bot_token, chat_id, message, **params)
+            return JSONResponse(content={"ok": True, "job_id": job.id}, status_code=202)
 
-    return Response(content=index_page, media_type="text/html")
+        result = await telegram_sender.send(bot_token, chat_id, message, **params)
+        return JSONResponse(content=result)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Send queue is full")
 
 
-@app.get("/telegram")
-async def telegram(bot_token: str, chat_id: str, message: str):
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    params = {
-        "chat_id": chat_id,
-        "text": message,
-        "disable_web_page_preview": "true",
-    }
+@app.post(WEBHOOK_PATH)
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: str | None = Header(default=None),
+):
+    """Receive bot updates from Telegram in webhook mode"""
+    token = x_telegram_bot_api_secret_token or ""
+    if not WEBHOOK_SECRET or not hmac.compare_digest(token, WEBHOOK_SECRET):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    # Telegram retries non-2xx deliveries, so a full queue sheds load safely
+    if not await TelegramBot().feed_update(await request.json()):
+        raise HTTPException(status_code=503, detail="Bot is not accepting updates")
+    return Response(status_code=200)
+
 
-    response = httpx.get(url, headers=headers, params=params)
-    return JSONResponse(content=response.json())
+@app.get("/telegram/jobs/{job_id}")
+async def telegram_job(job_id: str):
+    """Get the status of a queued telegram message"""
+    job = telegram_sender.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=job.to_dict())
 
 
 @app.get("/alive")
-async def alive(urls: list[str]):
-    """Check if the web service is alive"""
-    results = []
-    for url in urls:
-        try:
-            response = httpx.get(url)
-            if response.status_code != 200:
-                results.append({f"{url}": "failed", "message": str(e)})
-            else:
-                results.append({f"{url}": "success"})
-        except Exception as e:
-            results.append({f"{url}": "failed", "message": str(e)})
-    return JSONResponse(content=results)
+async def alive(
+    urls: list[str] = Query(),
+    stream: bool = False,
+    concurrency: int = Query(PROBE_CONCURRENCY, ge=1, le=200),
+    timeout: float = Query(PROBE_TIMEOUT, gt=0, le=60),
+):
+    """Check if the web services are alive"""
+    results = probe_many(urls, concurrency=concurrency, timeout=timeout)
+
+    if stream:
+        # NDJSON, one line per URL as soon as its probe completes
+        async def lines():
+            async for result in results:
+                yield json.dumps(result.to_dict()) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return JSONResponse(content=[result.to_dict() async for result in results])
+
+
+@app.get("/monitor")
+async def monitor():
+    """Get recent health of the alive URLs"""
+    return JSONResponse(
+        {"last_run": health_monitor.last_run, "result": health_monitor.summary()}
+    )
 
 
 @app.get("/restart")
 async def restart(uuid: str):
     """Restart the program"""
     global restart_lock
-    restart_uuid = redis_client.get("restart_uuid")
+    restart_uuid = await async_redis_client.get("restart_uuid")
     if uuid != restart_uuid:
         raise HTTPException(status_code=403, detail="Invalid UUID")
 
@@ -163,20 +259,13 @@ async def restart(uuid: str):
         raise HTTPException(status_code=400, detail="Restart already in progress")
 
     try:
-        bot = TelegramBot()
-        # Check bot status before restart
-        if bot.is_running:
-            bot.thread_stop()
-
-        # Start new bot instance
-        bot.thread_start()
+        await TelegramBot().restart()
 
         logging.info("Bot has been restarted successfully")
         return Response(content="Bot restarted successfully", media_type="text/html")
     except Exception as e:
-        restart_lock.release()
         handle_exception(
-            e, "Failed to restart bot", source="web", notify_func=send_message
+            e, "Failed to restart bot", source="web", notify=True
         )
         raise HTTPException(status_code=500, detail=f"Failed to restart: {str(e)}")
     finally:
@@ -186,33 +275,96 @@ async def restart(uuid: str):
 @app.get("/node")
 async def get_node():
     """Get node"""
-    result = redis_client.hgetall("node")
+    result = await redis_cache.hgetall("node")
     return JSONResponse({"status": "success", "result": result})
 
 
 @app.post("/node")
 async def create_node(name: str, node: str):
     """Set node"""
-    result = redis_client.hset("node", mapping={name: node})
+    result = await async_redis_client.hset("node", mapping={name: node})
+    redis_cache.invalidate("node")
     return JSONResponse({"status": "success", "result": result})
 
 
 @app.put("/node")
 async def update_node(name: str, node: str):
     """Update node"""
-    result = redis_client.hset("node", mapping={name: node})
+    result = await async_redis_client.hset("node", mapping={name: node})
+    redis_cache.invalidate("node")
     return JSONResponse({"status": "success", "result": result})
 
 
 @app.delete("/node")
 async def delete_node(name: str):
     """Delete node"""
-    result = redis_client.hdel("node", name)
+    result = await async_redis_client.hdel("node", name)
+    redis_cache.invalidate("node")
     return JSONResponse({"status": "success", "result": result})
 
 
 @app.get("/page")
 async def get_page():
     """Get page"""
-    result = redis_client.hgetall("page")
-    return JSONResponse({"status": "success", "result": result})
+    config = await get_config_snapshot("page")
+    return JSONResponse({"status": "success", "result": sorted(config.page)})
+
+
+@app.get("/pages")
+async def pages(
+    after: int = Query(default=0, ge=0),
+    limit: int = Query(default=PAGE_LIST_LIMIT, ge=1, le=PAGE_LIST_MAX_LIMIT),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """List pages without their content, pass next as after to get the following batch"""
+    result = await list_pages(session, after, limit)
+    return JSONResponse(
+        {
+            "status": "success",
+            "result": [page.model_dump() for page in result],
+            "next": result[-1].id if len(result) == limit else None,
+        }
+    )
+
+
+@app.post("/pages/import")
+async def import_pages_endpoint(uuid: str, request: Request):
+    """Import pages from the request body, one name-url per line"""
+    if uuid != await async_redis_client.get("restart_uuid"):
+        raise HTTPException(status_code=403, detail="Invalid UUID")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > PAGE_IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Import is too large")
+    try:
+        report = await import_pages(body.decode("utf-8", errors="replace"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({"status": "success", "result": report.to_dict()})
+
+
+@app.get("/metrics")
+async def metrics():
+    """Export counters and latency histograms in Prometheus text format"""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/stats")
+async def stats():
+    """Get internal cache, bot, outbound HTTP, database pool and scheduler statistics"""
+    return JSONResponse(
+        {
+            "redis_cache": redis_cache.stats(),
+            "page_cache": page_cache.stats(),
+            "page_refresh": page_refresher.stats(),
+            "notifier": admin_notifier.stats(),
+            "bot": TelegramBot().stats(),
+            "http": HttpClient.stats.snapshot(),
+            "db": get_pool_stats(),
+            "scheduler": scheduler.stats(),
+        }
+    )